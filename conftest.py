@@ -0,0 +1,15 @@
+import pytest
+
+
+@pytest.fixture(autouse=True, scope='session')
+def eager_tasks():
+    """Настройки тестов из core.testing на всю сессию.
+
+    Фикстура уровня сессии действует и в setUpClass/setUpTestData,
+    как EagerTasksRunner в manage.py test.
+    """
+    from django.test.utils import override_settings
+
+    from core.testing import TEST_SETTINGS
+    with override_settings(**TEST_SETTINGS):
+        yield
@@ -0,0 +1,88 @@
+"""Представление объектов в ответах API.
+
+Каждая функция строит полный словарь объекта, а связи по умолчанию
+выводит ключами (имя автора, slug группы). Связи из include
+разворачиваются во вложенные объекты; данные для них подгружают
+запросы представлений, сериализация в базу не обращается.
+"""
+from django.urls import reverse
+
+# Поля объектов и связи, которые можно развернуть через include
+POST_FIELDS = ('id', 'text', 'pub_date', 'author', 'group', 'image',
+               'comments_count', 'url')
+POST_INCLUDES = ('author', 'group', 'image')
+COMMENT_FIELDS = ('id', 'post', 'parent', 'author', 'text', 'pub_date',
+                  'replies_count')
+COMMENT_INCLUDES = ('author',)
+GROUP_FIELDS = ('slug', 'title', 'description', 'posts_count', 'url')
+
+
+def _absolute(request, url):
+    return request.build_absolute_uri(url)
+
+
+def _selected(data, fields):
+    return {key: value for key, value in data.items() if key in fields}
+
+
+def author(user):
+    # Автор всегда выводится целиком: у него всего два поля
+    return {'username': user.username, 'full_name': user.get_full_name()}
+
+
+def group(request, obj, fields=GROUP_FIELDS):
+    return _selected({
+        'slug': obj.slug,
+        'title': obj.title,
+        'description': obj.description,
+        'posts_count': obj.posts_count,
+        'url': _absolute(request, reverse(
+            'api:group_detail', args=(obj.slug,))),
+    }, fields)
+
+
+def image(request, obj):
+    variants = [
+        {'url': _absolute(request, variant.image.url),
+         'format': variant.format, 'width': variant.width,
+         'height': variant.height}
+        for variant in obj.image_variants.all()
+        if variant.source == obj.image.name
+    ]
+    return {'url': _absolute(request, obj.image.url), 'variants': variants}
+
+
+def post(request, obj, fields=POST_FIELDS, include=()):
+    data = {
+        'id': obj.pk,
+        'text': obj.text,
+        'pub_date': obj.pub_date,
+        'author': obj.author.username,
+        'group': obj.group.slug if obj.group_id else None,
+        'image': _absolute(request, obj.image.url) if obj.image else None,
+        'comments_count': obj.comments_count,
+        'url': _absolute(request, reverse(
+            'api:post_detail', args=(obj.pk,))),
+    }
+    if 'author' in include:
+        data['author'] = author(obj.author)
+    if 'group' in include and obj.group_id:
+        data['group'] = group(request, obj.group)
+    if 'image' in include and obj.image:
+        data['image'] = image(request, obj)
+    return _selected(data, fields)
+
+
+def comment(request, obj, fields=COMMENT_FIELDS, include=()):
+    data = {
+        'id': obj.pk,
+        'post': obj.post_id,
+        'parent': obj.parent_id,
+        'author': obj.author.username,
+        'text': obj.text,
+        'pub_date': obj.pub_date,
+        'replies_count': obj.replies_count,
+    }
+    if 'author' in include:
+        data['author'] = author(obj.author)
+    return _selected(data, fields)
@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.author,
+                                group=cls.group if number % 2 else None)
+            for number in range(5)
+        ]
+        cls.comment = Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_post_list_cursor(self):
+        """Список постов листается курсором от новых к старым."""
+        url = reverse('api:post_list')
+        data = self.client.get(url, {'limit': 2}).json()
+        self.assertEqual([post['id'] for post in data['results']],
+                         [self.posts[4].pk, self.posts[3].pk])
+        self.assertIsNone(data['previous'])
+        seen = [post['id'] for post in data['results']]
+        while data['next']:
+            # Ссылка на следующую страницу сохраняет limit
+            data = self.client.get(data['next']).json()
+            seen += [post['id'] for post in data['results']]
+        self.assertEqual(seen, [post.pk for post in reversed(self.posts)])
+
+    def test_fields_and_include(self):
+        """fields ограничивает поля, include разворачивает связи."""
+        response = self.client.get(
+            reverse('api:post_detail', args=(self.posts[1].pk,)),
+            {'fields': 'id,author,group', 'include': 'author,group'})
+        self.assertEqual(response.json(), {
+            'id': self.posts[1].pk,
+            'author': {'username': 'author', 'full_name': 'Лев Толстой'},
+            'group': {
+                'slug': 'group', 'title': 'Группа',
+                'description': 'Описание', 'posts_count': 2,
+                'url': 'http://testserver' + reverse(
+                    'api:group_detail', args=('group',)),
+            },
+        })
+        response = self.client.get(
+            reverse('api:post_list'), {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', response.json()['detail'])
+
+    def test_list_queries(self):
+        """Число запросов списка не зависит от числа постов."""
+        with self.assertNumQueries(1):
+            self.client.get(reverse('api:post_list'),
+                            {'include': 'author,group'})
+        with self.assertNumQueries(2):
+            self.client.get(reverse('api:post_list'), {'include': 'image'})
+
+    def test_filters_and_comments(self):
+        """Фильтр по группе и комментарии поста."""
+        data = self.client.get(
+            reverse('api:post_list'), {'group': 'group'}).json()
+        self.assertEqual(len(data['results']), 2)
+        data = self.client.get(reverse(
+            'api:comment_list', args=(self.posts[0].pk,))).json()
+        self.assertEqual(data['results'][0]['text'], 'Комментарий')
+        self.assertEqual(data['results'][0]['author'], 'reader')
+        self.assertEqual(self.client.get(reverse(
+            'api:comment_detail', args=(self.comment.pk,))).json()['post'],
+            self.posts[0].pk)
+
+    def test_follow_feed(self):
+        """Лента подписок доступна только авторизованным."""
+        url = reverse('api:follow_list')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.reader)
+        data = self.client.get(url).json()
+        self.assertEqual(len(data['results']), 5)
+
+    def test_unread_count(self):
+        """Число непрочитанных читается одним запросом к счётчику."""
+        url = reverse('api:unread_count')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        Post.objects.create(text='Новый пост', author=self.author)
+        self.client.force_login(self.reader)
+        # Сессия, пользователь и сам счётчик
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.json(), {'unread': 1})
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_errors(self):
+        """Отсутствующие объекты и запись дают ошибки в JSON."""
+        response = self.client.get(reverse('api:post_detail', args=(0,)))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'Не найдено'})
+        response = self.client.get(
+            reverse('api:group_detail', args=('missing',)))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,193 @@
+"""JSON API только для чтения.
+
+Списки постов используют те же запросы, что и HTML-страницы
+(PostQuerySet.with_related, лента FeedEntry), и курсорную пагинацию
+posts.utils.KeysetPaginator. Параметр fields ограничивает поля ответа,
+include разворачивает связи во вложенные объекты.
+"""
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
+
+from posts import notifications
+from posts.constants import CURSOR_PARAM
+from posts.models import Comment, FeedEntry, Group, Post
+from posts.utils import KeysetPaginator
+
+from . import serializers
+from .constants import API_MAX_PAGE_SIZE, API_PAGE_SIZE
+
+
+class ApiError(Exception):
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def _response(data, status=200):
+    return JsonResponse(data, status=status, encoder=DjangoJSONEncoder,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def api_view(view):
+    """GET и HEAD, ошибки в виде {"detail": ...}."""
+    @require_safe
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return _response(view(request, *args, **kwargs))
+        except Http404:
+            return _response({'detail': 'Не найдено'}, status=404)
+        except ApiError as error:
+            return _response({'detail': error.detail}, status=error.status)
+    return wrapper
+
+
+def _names(request, param, allowed, default):
+    if param not in request.GET:
+        return default
+    names = [name for name in request.GET[param].split(',') if name]
+    unknown = set(names) - set(allowed)
+    if unknown:
+        raise ApiError(
+            f'Неизвестные значения {param}: {", ".join(sorted(unknown))}. '
+            f'Допустимы: {", ".join(allowed)}')
+    return names
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError('limit должен быть числом')
+    return min(max(limit, 1), API_MAX_PAGE_SIZE)
+
+
+def _page_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query[CURSOR_PARAM] = cursor
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+
+def _paginated(request, queryset, serialize):
+    page = KeysetPaginator(queryset, _limit(request)).get_page(
+        request.GET.get(CURSOR_PARAM))
+    return {
+        'results': [serialize(obj) for obj in page],
+        'next': _page_url(request, page.next_cursor),
+        'previous': _page_url(request, page.previous_cursor),
+    }
+
+
+def _post_options(request):
+    fields = _names(request, 'fields', serializers.POST_FIELDS,
+                    serializers.POST_FIELDS)
+    include = _names(request, 'include', serializers.POST_INCLUDES, ())
+    return fields, include
+
+
+def _posts(include):
+    posts = Post.objects.with_related()
+    if 'image' not in include:
+        # Варианты картинок нужны только развёрнутой картинке
+        posts = posts.prefetch_related(None)
+    return posts
+
+
+@api_view
+def post_list(request):
+    fields, include = _post_options(request)
+    posts = _posts(include)
+    if 'group' in request.GET:
+        posts = posts.filter(group__slug=request.GET['group'])
+    if 'author' in request.GET:
+        posts = posts.filter(author__username=request.GET['author'])
+    return _paginated(request, posts, lambda post: serializers.post(
+        request, post, fields, include))
+
+
+@api_view
+def post_detail(request, post_id):
+    fields, include = _post_options(request)
+    post = get_object_or_404(_posts(include), pk=post_id)
+    return serializers.post(request, post, fields, include)
+
+
+def _comment_options(request):
+    fields = _names(request, 'fields', serializers.COMMENT_FIELDS,
+                    serializers.COMMENT_FIELDS)
+    include = _names(request, 'include', serializers.COMMENT_INCLUDES, ())
+    return fields, include
+
+
+@api_view
+def comment_list(request, post_id):
+    fields, include = _comment_options(request)
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author')
+    return _paginated(request, comments, lambda comment: serializers.comment(
+        request, comment, fields, include))
+
+
+@api_view
+def comment_detail(request, comment_id):
+    fields, include = _comment_options(request)
+    comment = get_object_or_404(
+        Comment.objects.select_related('author'), pk=comment_id)
+    return serializers.comment(request, comment, fields, include)
+
+
+def _group_fields(request):
+    return _names(request, 'fields', serializers.GROUP_FIELDS,
+                  serializers.GROUP_FIELDS)
+
+
+@api_view
+def group_list(request):
+    # Групп немного, поэтому список отдаётся целиком
+    fields = _group_fields(request)
+    return {'results': [
+        serializers.group(request, group, fields)
+        for group in Group.objects.order_by('title')
+    ]}
+
+
+@api_view
+def group_detail(request, slug):
+    fields = _group_fields(request)
+    return serializers.group(
+        request, get_object_or_404(Group, slug=slug), fields)
+
+
+def _require_user(request):
+    if not request.user.is_authenticated:
+        raise ApiError('Требуется авторизация', status=401)
+
+
+@api_view
+def follow_list(request):
+    _require_user(request)
+    fields, include = _post_options(request)
+    entries = FeedEntry.objects.filter(user=request.user).select_related(
+        'post__author', 'post__group')
+    if 'image' in include:
+        entries = entries.prefetch_related('post__image_variants')
+    return _paginated(request, entries, lambda entry: serializers.post(
+        request, entry.post, fields, include))
+
+
+@never_cache
+@api_view
+def unread_count(request):
+    # Счётчик хранится в UserStats, ленту для него не читаем
+    _require_user(request)
+    return {'unread': notifications.unread_count(request.user.pk)}
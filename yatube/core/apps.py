@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .sqlite import configure_connection
+        from .tasks import check_cache
+        check_cache()
+        connection_created.connect(configure_connection)
+        # Воркер должен знать задачи всех приложений
+        autodiscover_modules('tasks')
@@ -0,0 +1,128 @@
+"""Запуск WSGI-приложения под ASGI-сервером.
+
+Django 2.2 не умеет ни ASGI, ни асинхронных представлений, поэтому
+запрос по-прежнему обрабатывается синхронно — в пуле из ASGI_THREADS
+потоков. Соединения же держит цикл событий сервера: простаивающие
+keep-alive и чтение тела запроса не занимают поток, и число открытых
+соединений на процесс не ограничено числом потоков.
+"""
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+def _wsgi_str(value):
+    # ASGI отдаёт путь декодированным, а WSGI ждёт байты UTF-8 как latin-1
+    return value.encode('utf-8').decode('latin-1')
+
+
+def _environ(scope, body):
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': _wsgi_str(scope.get('root_path', '')),
+        'PATH_INFO': _wsgi_str(scope['path']),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ[name] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f'HTTP_{name}'
+            # Повторные заголовки склеиваются, как в WSGI-серверах
+            environ[key] = (f'{environ[key]},{value}'
+                            if key in environ else value)
+    return environ
+
+
+class WsgiToAsgi:
+    """ASGI-приложение (протокол 3.0) поверх WSGI-приложения."""
+
+    def __init__(self, wsgi_application, threads=None):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads or settings.ASGI_THREADS,
+            thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Тип соединения {scope["type"]} не поддержан')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def http(self, scope, receive, send):
+        # Тело читается в цикле событий, поток нужен только Django
+        body = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        loop = asyncio.get_running_loop()
+        environ = _environ(scope, b''.join(body))
+        await loop.run_in_executor(
+            self.executor, self.respond, environ,
+            lambda message: asyncio.run_coroutine_threadsafe(
+                send(message), loop).result())
+
+    def respond(self, environ, emit):
+        """Выполняет WSGI-запрос целиком в одном потоке пула.
+
+        Соединения Django с базой привязаны к потоку, поэтому и ответ,
+        и его закрытие (сигнал request_finished) остаются в нём же.
+        """
+        headers = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            headers['start'] = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [
+                    (name.lower().encode('latin-1'),
+                     value.encode('latin-1'))
+                    for name, value in response_headers],
+            }
+
+        chunks = self.wsgi_application(environ, start_response)
+        try:
+            emit(headers['start'])
+            for chunk in chunks:
+                # Потоковые ответы (ленты) уходят клиенту по частям
+                if chunk:
+                    emit({'type': 'http.response.body', 'body': chunk,
+                          'more_body': True})
+            emit({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
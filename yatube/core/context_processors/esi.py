@@ -0,0 +1,8 @@
+from django.conf import settings
+
+
+def esi(request):
+    """Включены ли edge side includes для пользовательских фрагментов."""
+    return {
+        'esi_enabled': settings.ESI_ENABLED
+    }
@@ -0,0 +1,132 @@
+"""Перенос данных между базами, например из db.sqlite3 в PostgreSQL.
+
+Строки читаются из источника итератором пачками и записываются
+bulk_create, поэтому память не зависит от размера таблиц. Сигналы при
+этом не отправляются: счётчики, ленты и индекс поиска переносятся как
+готовые таблицы.
+"""
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connections, router, transaction
+from django.db.migrations.executor import MigrationExecutor
+
+SOURCE_ALIAS = 'copy_source'
+
+
+@contextmanager
+def sqlite_source(path, alias=SOURCE_ALIAS):
+    """Временно подключает файл SQLite как базу alias."""
+    connections.databases[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+    }
+    connections.ensure_defaults(alias)
+    connections.prepare_test_settings(alias)
+    try:
+        yield alias
+    finally:
+        connections[alias].close()
+        delattr(connections._connections, alias)
+        del connections.databases[alias]
+
+
+def unapplied_migrations(alias):
+    """Миграции, которых не хватает базе alias до текущих моделей.
+
+    Источник читается текущими моделями, поэтому в его таблицах должны
+    быть все их столбцы.
+    """
+    executor = MigrationExecutor(connections[alias])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    return [migration for migration, _ in plan]
+
+
+def copied_models(using):
+    """Модели в порядке зависимостей: сначала те, на которые ссылаются."""
+    models = [
+        model for model in apps.get_models(include_auto_created=True)
+        if model._meta.managed and not model._meta.proxy
+        and router.allow_migrate_model(using, model)
+    ]
+    ordered = []
+
+    def visit(model, path=()):
+        if model in ordered or model in path:
+            return
+        for field in model._meta.concrete_fields:
+            related = field.related_model
+            if related is not None and related is not model:
+                visit(related._meta.concrete_model, path + (model,))
+        ordered.append(model)
+
+    for model in models:
+        visit(model)
+    return [model for model in ordered if model in models]
+
+
+@contextmanager
+def original_dates(model):
+    """Не даёт auto_now и auto_now_add перезаписать переносимые даты."""
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _copy_model(model, source, target, batch_size):
+    rows = model._base_manager.using(source).order_by('pk').iterator(
+        chunk_size=batch_size)
+    manager = model._base_manager.using(target)
+    batch, copied = [], 0
+    with original_dates(model):
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                manager.bulk_create(batch)
+                copied += len(batch)
+                batch = []
+        if batch:
+            manager.bulk_create(batch)
+            copied += len(batch)
+    return copied
+
+
+def copy_data(source, target, batch_size, log=lambda message: None):
+    """Заменяет данные базы target данными source, возвращает число строк.
+
+    Всё выполняется в одной транзакции, при ошибке target остаётся
+    нетронутой.
+    """
+    source_tables = set(connections[source].introspection.table_names())
+    models = [model for model in copied_models(target)
+              if model._meta.db_table in source_tables]
+    connection = connections[target]
+    total = 0
+    with transaction.atomic(using=target):
+        # Очистка без сигналов удаления, как в команде flush
+        flush = connection.ops.sql_flush(
+            no_style(), [model._meta.db_table for model in models], ())
+        with connection.cursor() as cursor:
+            for sql in flush:
+                cursor.execute(sql)
+        for model in models:
+            copied = _copy_model(model, source, target, batch_size)
+            log(f'{model._meta.label}: {copied}')
+            total += copied
+        # Первичные ключи пришли из источника, последовательности
+        # PostgreSQL нужно сдвинуть за максимальные значения
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+    return total
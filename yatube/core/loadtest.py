@@ -0,0 +1,68 @@
+"""Нагрузочный замер HTTP-сервера: запросы в секунду и задержки.
+
+Клиенты — потоки с собственными сессиями requests (keep-alive), каждый
+запрашивает адреса по кругу, пока не истечёт время замера. Так можно
+сравнить один и тот же проект под WSGI- и ASGI-сервером.
+"""
+import threading
+import time
+from statistics import median
+
+import requests
+
+
+def _percentile(values, share):
+    if not values:
+        return None
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+def run(base_url, paths, concurrency=10, duration=5.0, timeout=30.0):
+    """Нагружает base_url и возвращает сводку замера."""
+    stop = threading.Event()
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def client(number):
+        session = requests.Session()
+        local, failed = [], 0
+        index = number
+        while not stop.is_set():
+            url = base_url.rstrip('/') + paths[index % len(paths)]
+            index += 1
+            started = time.perf_counter()
+            try:
+                response = session.get(url, timeout=timeout)
+                ok = response.status_code < 500
+            except requests.RequestException:
+                ok = False
+            if ok:
+                local.append(time.perf_counter() - started)
+            else:
+                failed += 1
+        session.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(number,))
+               for number in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'requests_per_second': len(latencies) / elapsed,
+        'latency_ms': {
+            'p50': median(latencies) * 1000 if latencies else None,
+            'p95': (_percentile(latencies, 0.95) or 0) * 1000,
+            'p99': (_percentile(latencies, 0.99) or 0) * 1000,
+        },
+    }
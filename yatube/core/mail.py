@@ -0,0 +1,38 @@
+"""Отправка писем через очередь задач."""
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .tasks import send_email
+
+
+def _serialized(message):
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+    }
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Ставит письма в очередь; отправляет их TASKS_EMAIL_BACKEND.
+
+    Вложения не переносятся через JSON, такие письма отправляются сразу.
+    """
+
+    def send_messages(self, email_messages):
+        queued = [message for message in email_messages
+                  if not message.attachments]
+        direct = [message for message in email_messages
+                  if message.attachments]
+        if queued:
+            send_email.delay([_serialized(message) for message in queued])
+        if direct:
+            get_connection(settings.TASKS_EMAIL_BACKEND).send_messages(direct)
+        return len(email_messages)
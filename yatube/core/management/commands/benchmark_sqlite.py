@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sqlite import ROLLBACK_PRAGMAS, WAL_PRAGMAS, measure
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает чтение SQLite под нагрузкой записи в режиме WAL '
+            'и с журналом отката')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5.0,
+                            help='Секунд на каждый режим')
+        parser.add_argument('--rows', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        modes = {
+            'rollback': ROLLBACK_PRAGMAS,
+            'wal': {**settings.SQLITE_PRAGMAS, **WAL_PRAGMAS},
+        }
+        results = {}
+        for name, pragmas in modes.items():
+            results[name] = measure(
+                pragmas, readers=options['readers'],
+                duration=options['duration'], rows=options['rows'])
+            self.stdout.write(
+                f'{name:<10} '
+                f'чтений/с {results[name]["reads_per_second"]:>10.0f}   '
+                f'записей/с {results[name]["writes_per_second"]:>8.0f}')
+        baseline = results['rollback']['reads_per_second']
+        if baseline:
+            ratio = results['wal']['reads_per_second'] / baseline
+            self.stdout.write(self.style.SUCCESS(
+                f'Чтение в режиме WAL быстрее в {ratio:.1f} раза'))
@@ -0,0 +1,48 @@
+import os
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from core.dbcopy import copy_data, sqlite_source, unapplied_migrations
+
+
+class Command(BaseCommand):
+    help = ('Переносит все данные из файла SQLite в базу из настроек '
+            '(например, PostgreSQL). Данные целевой базы заменяются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Путь к файлу db.sqlite3')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help='Целевая база из settings.DATABASES')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--no-input', action='store_false',
+                            dest='interactive')
+        parser.add_argument(
+            '--migrate', action='store_true',
+            help='Сначала применить к файлу недостающие миграции '
+                 '(файл изменится)')
+
+    def handle(self, *args, **options):
+        if not os.path.isfile(options['source']):
+            raise CommandError(f'Файл {options["source"]} не найден')
+        if options['interactive']:
+            answer = input(
+                'Все данные базы '
+                f'{options["database"]} будут заменены. Продолжить? [y/N] ')
+            if answer.lower() != 'y':
+                raise CommandError('Перенос отменён')
+        with sqlite_source(options['source']) as source:
+            if options['migrate']:
+                call_command('migrate', database=source, verbosity=0)
+            missing = unapplied_migrations(source)
+            if missing:
+                raise CommandError(
+                    f'В файле не применено миграций: {len(missing)} '
+                    f'(первая — {missing[0]}). Запустите команду с '
+                    '--migrate или сделайте резервную копию и выполните '
+                    'migrate для этого файла')
+            total = copy_data(
+                source, options['database'], options['batch_size'],
+                log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f'Перенесено строк: {total}'))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadtest import run
+
+DEFAULT_PATHS = ['/', '/about/tech/', '/search/?q=пост']
+
+
+class Command(BaseCommand):
+    help = ('Нагружает запущенные серверы проекта и сравнивает их, '
+            'например gunicorn (yatube.wsgi) и uvicorn (yatube.asgi)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'targets', nargs='+', metavar='NAME=URL',
+            help='Серверы, например wsgi=http://127.0.0.1:8000')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='Адрес страницы, можно несколько раз')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--duration', type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['targets']:
+            name, _, url = target.partition('=')
+            if not url:
+                raise CommandError(f'Ожидается NAME=URL, получено {target}')
+            targets.append((name, url))
+        paths = options['paths'] or DEFAULT_PATHS
+        self.stdout.write(
+            f'{"сервер":<10} {"запросов/с":>11} {"ошибок":>7} '
+            f'{"p50, мс":>8} {"p95, мс":>8} {"p99, мс":>8}')
+        for name, url in targets:
+            result = run(url, paths, options['concurrency'],
+                         options['duration'])
+            latency = result['latency_ms']
+            self.stdout.write(
+                f'{name:<10} {result["requests_per_second"]:>11.1f} '
+                f'{result["errors"]:>7} {latency["p50"] or 0:>8.1f} '
+                f'{latency["p95"]:>8.1f} {latency["p99"]:>8.1f}')
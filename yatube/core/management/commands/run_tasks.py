@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.tasks import run_pending
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи из очереди core.Task'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться')
+        parser.add_argument(
+            '--sleep', type=float, default=settings.TASKS_POLL_SECONDS,
+            help='Пауза между опросами пустой очереди, секунд')
+
+    def handle(self, *args, **options):
+        while True:
+            done, failed = run_pending()
+            if done or failed:
+                self.stdout.write(
+                    f'Выполнено задач: {done}, с ошибкой: {failed}')
+            if options['once']:
+                break
+            # Долгоживущему процессу нужно закрывать устаревшие соединения
+            close_old_connections()
+            time.sleep(options['sleep'])
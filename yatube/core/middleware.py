@@ -0,0 +1,112 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import profiling, routing
+
+logger = logging.getLogger('core.profiling')
+
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ProfilingMiddleware:
+    """Считает SQL-запросы, время шаблонов и размер ответа.
+
+    Включается настройкой PROFILING_ENABLED для всех запросов или
+    заголовком X-Profile, если PROFILING_ALLOW_HEADER разрешает его.
+    Результат уходит в заголовок Server-Timing и в лог core.profiling.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def is_enabled(self, request):
+        if getattr(settings, 'PROFILING_ENABLED', False):
+            return True
+        return (getattr(settings, 'PROFILING_ALLOW_HEADER', False)
+                and 'HTTP_X_PROFILE' in request.META)
+
+    def __call__(self, request):
+        if not self.is_enabled(request):
+            return self.get_response(request)
+
+        profile = profiling.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            profiling.stop()
+        total_time = time.perf_counter() - started
+
+        size = None if response.streaming else len(response.content)
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={profile.sql_time * 1000:.1f};'
+            f'desc="{len(profile.queries)} queries, '
+            f'{profile.duplicate_queries} duplicated"',
+            f'tpl;dur={profile.template_time * 1000:.1f}',
+            f'total;dur={total_time * 1000:.1f}',
+        ))
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': getattr(request.resolver_match, 'view_name', None),
+            'status': response.status_code,
+            'queries': len(profile.queries),
+            'duplicate_queries': profile.duplicate_queries,
+            'sql_ms': round(profile.sql_time * 1000, 3),
+            'template_ms': round(profile.template_time * 1000, 3),
+            'total_ms': round(total_time * 1000, 3),
+            'response_bytes': size,
+        }))
+        return response
+
+
+class ReplicaMiddleware:
+    """Направляет чтения страниц из READ_REPLICA_VIEWS в реплики.
+
+    После запроса, изменяющего данные (любым методом), cookie на
+    DATABASE_REPLICA_PIN_SECONDS оставляет браузер на основной базе,
+    чтобы он сразу видел свою запись.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routing.reset()
+        try:
+            response = self.get_response(request)
+            # Подписка и отписка, например, пишут в базу по GET
+            wrote = routing.wrote()
+        finally:
+            routing.reset()
+        if wrote or request.method not in SAFE_METHODS:
+            pin_seconds = settings.DATABASE_REPLICA_PIN_SECONDS
+            response.set_cookie(
+                PIN_COOKIE, str(int(time.time()) + pin_seconds),
+                max_age=pin_seconds, httponly=True, samesite='Lax')
+        return response
+
+    def is_pinned(self, request):
+        try:
+            return int(request.COOKIES[PIN_COOKIE]) > time.time()
+        except (KeyError, ValueError):
+            return False
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        replicas = settings.DATABASE_REPLICAS
+        if (replicas and request.method in SAFE_METHODS
+                and request.resolver_match.view_name
+                in settings.READ_REPLICA_VIEWS
+                and not self.is_pinned(request)):
+            routing.set_current(random.choice(replicas))
@@ -0,0 +1,73 @@
+"""Замер SQL и отрисовки шаблонов в рамках одного запроса."""
+import threading
+import time
+from collections import Counter
+
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+from django.template.backends.django import reraise
+
+_state = threading.local()
+
+
+class RequestProfile:
+    """Накопитель замеров одного запроса."""
+
+    def __init__(self):
+        self.queries = []
+        self.template_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Обёртка для connection.execute_wrapper
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    @property
+    def sql_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    @property
+    def duplicate_queries(self):
+        counts = Counter(sql for sql, _ in self.queries)
+        return sum(count - 1 for count in counts.values())
+
+
+def start():
+    _state.profile = RequestProfile()
+    return _state.profile
+
+
+def stop():
+    _state.profile = None
+
+
+def current():
+    return getattr(_state, 'profile', None)
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        profile = current()
+        if profile is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            profile.template_time += time.perf_counter() - started
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Шаблонизатор Django, который учитывает время отрисовки."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
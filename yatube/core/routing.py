@@ -0,0 +1,53 @@
+"""Чтение со страниц-списков из реплик базы.
+
+ReplicaMiddleware выбирает реплику для GET-запросов к представлениям из
+READ_REPLICA_VIEWS, ReplicaRouter отправляет в неё чтения этого
+запроса. Запись всегда идёт в default. После запроса с записью — не
+только POST, но и GET, который что-то изменил, — браузер на
+DATABASE_REPLICA_PIN_SECONDS получает cookie, и все его запросы читают
+из default, пока реплики догоняют основную базу.
+"""
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_state = threading.local()
+
+
+def current():
+    """Псевдоним базы для чтений текущего запроса или None."""
+    return getattr(_state, 'alias', None)
+
+
+def set_current(alias):
+    _state.alias = alias
+
+
+def wrote():
+    """Писал ли текущий запрос в базу."""
+    return getattr(_state, 'wrote', False)
+
+
+def reset():
+    _state.alias = None
+    _state.wrote = False
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return current()
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схему реплик обновляет репликация с основной базы
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
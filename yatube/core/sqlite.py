@@ -0,0 +1,108 @@
+"""Настройка соединений SQLite и замер чтения под нагрузкой записи.
+
+В режиме WAL читатели не ждут пишущую транзакцию: они видят последний
+зафиксированный снимок, а запись идёт в отдельный журнал. Прагмы из
+settings.SQLITE_PRAGMAS применяются к каждому новому соединению; режим
+журнала меняется, только если задан SQLITE_JOURNAL_MODE.
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+# Режим журнала хранится в файле базы, остальные прагмы действуют
+# только на соединение
+ROLLBACK_PRAGMAS = {'journal_mode': 'delete', 'synchronous': 'full'}
+WAL_PRAGMAS = {'journal_mode': 'wal', 'synchronous': 'normal'}
+
+
+def apply_pragmas(raw_connection, pragmas):
+    for name, value in pragmas.items():
+        raw_connection.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Обработчик connection_created: прагмы для соединений SQLite."""
+    # Базе в памяти (тесты) журнал и mmap не нужны, а смена режима
+    # журнала берёт блокировку общего кэша, которую ждут другие потоки
+    if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+        return
+    apply_pragmas(connection.connection,
+                  getattr(settings, 'SQLITE_PRAGMAS', {}))
+
+
+def _connect(path, pragmas):
+    raw_connection = sqlite3.connect(
+        path, timeout=30, isolation_level=None, check_same_thread=False)
+    apply_pragmas(raw_connection, pragmas)
+    return raw_connection
+
+
+def _prepare(path, pragmas, rows):
+    raw_connection = _connect(path, pragmas)
+    raw_connection.execute('BEGIN')
+    raw_connection.execute(
+        'CREATE TABLE post (id INTEGER PRIMARY KEY, author_id INTEGER, '
+        'pub_date REAL, text TEXT)')
+    raw_connection.execute(
+        'CREATE INDEX post_author_date ON post (author_id, pub_date)')
+    raw_connection.executemany(
+        'INSERT INTO post (author_id, pub_date, text) VALUES (?, ?, ?)',
+        ((number % 100, number, 'Текст поста ' * 20)
+         for number in range(rows)))
+    raw_connection.execute('COMMIT')
+    raw_connection.close()
+
+
+def measure(pragmas, readers=4, duration=2.0, rows=10000):
+    """Чтения и записи в секунду при readers читателях и одном писателе.
+
+    Читатели выбирают страницу постов автора, как профиль, писатель
+    добавляет посты по одному в отдельных транзакциях.
+    """
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'benchmark.sqlite3')
+    _prepare(path, pragmas, rows)
+    stop = threading.Event()
+    reads, writes = [0] * readers, [0]
+
+    def read(number):
+        raw_connection = _connect(path, pragmas)
+        author_id = 0
+        while not stop.is_set():
+            author_id = (author_id + 1) % 100
+            raw_connection.execute(
+                'SELECT id, pub_date, text FROM post WHERE author_id = ? '
+                'ORDER BY pub_date DESC LIMIT 10', (author_id,)).fetchall()
+            reads[number] += 1
+        raw_connection.close()
+
+    def write():
+        raw_connection = _connect(path, pragmas)
+        while not stop.is_set():
+            raw_connection.execute('BEGIN IMMEDIATE')
+            raw_connection.execute(
+                'INSERT INTO post (author_id, pub_date, text) '
+                'VALUES (?, ?, ?)', (writes[0] % 100, time.time(), 'Пост'))
+            raw_connection.execute('COMMIT')
+            writes[0] += 1
+        raw_connection.close()
+
+    threads = [threading.Thread(target=read, args=(number,))
+               for number in range(readers)]
+    threads.append(threading.Thread(target=write))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    shutil.rmtree(directory, ignore_errors=True)
+    return {
+        'reads_per_second': sum(reads) / duration,
+        'writes_per_second': writes[0] / duration,
+    }
@@ -0,0 +1,187 @@
+"""Очередь задач в базе данных.
+
+Функция, отмеченная декоратором @task, получает метод delay(). В
+очереди он добавляет строку Task — запрос на запись завершается одним
+INSERT, а работу выполняет команда run_tasks. При TASKS_EAGER задача
+выполняется сразу в том же процессе: так запускаются тесты.
+
+Аргументы задач передаются через JSON, поэтому в них кладут
+идентификаторы и строки, а не объекты моделей.
+"""
+import json
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+_deferred = threading.local()
+
+
+def task(func):
+    """Регистрирует функцию как задачу и добавляет ей delay()."""
+    name = f'{func.__module__}.{func.__name__}'
+    registry[name] = func
+    func.task_name = name
+    func.delay = lambda *args: enqueue(name, *args)
+    return func
+
+
+def shared_cache(alias='default'):
+    """Видят ли кэш alias все процессы: воркер и веб-процессы."""
+    return not isinstance(caches[alias], LocMemCache)
+
+
+def check_cache():
+    """Не даёт запустить очередь с кэшем, который есть только у воркера.
+
+    Задачи переводят поколения кэша (posts.cache); в LocMemCache это
+    изменение осталось бы в процессе run_tasks, и страницы не
+    обновлялись бы никогда.
+    """
+    if not settings.TASKS_EAGER and not shared_cache():
+        raise ImproperlyConfigured(
+            'Очереди задач нужен общий кэш: задайте CACHE_BACKEND '
+            '(file, memcached, redis) или TASKS_EAGER=1')
+
+
+def enqueue(name, *args):
+    """Ставит задачу в очередь или выполняет её сразу при TASKS_EAGER."""
+    if name not in registry:
+        raise KeyError(f'Задача {name} не зарегистрирована')
+    payload = json.dumps(args)
+    if settings.TASKS_EAGER:
+        # Те же аргументы, что получил бы воркер
+        registry[name](*json.loads(payload))
+        return None
+    return Task.objects.create(name=name, args=payload)
+
+
+def after_commit(func, *args):
+    """Вызывает func(*args) после фиксации транзакции задачи.
+
+    Так поколения кэша меняются, только когда изменения задачи уже
+    видны другим соединениям: иначе запрос между сбросом и фиксацией
+    сохранил бы старые данные под новым ключом. Вне run() (TASKS_EAGER,
+    команды) func вызывается сразу.
+    """
+    callbacks = getattr(_deferred, 'callbacks', None)
+    if callbacks is None:
+        func(*args)
+    else:
+        callbacks.append((func, args))
+
+
+def _ready(now):
+    stale = now - timedelta(seconds=settings.TASKS_LOCK_TIMEOUT)
+    # Задачи упавшего воркера возвращаются в работу по таймауту
+    return (Q(status=Task.QUEUED, run_at__lte=now)
+            | Q(status=Task.RUNNING, locked_at__lt=stale))
+
+
+def claim():
+    """Забирает готовую задачу или возвращает None.
+
+    Условный UPDATE не даёт двум воркерам взять одну и ту же задачу.
+    """
+    now = timezone.now()
+    candidates = Task.objects.filter(_ready(now)).order_by(
+        'run_at', 'id').values_list('pk', flat=True)[:10]
+    for pk in candidates:
+        claimed = Task.objects.filter(_ready(now), pk=pk).update(
+            status=Task.RUNNING, locked_at=now, attempts=F('attempts') + 1)
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+class Reclaimed(Exception):
+    """Задачу по таймауту забрал другой воркер."""
+
+
+def run(job):
+    """Выполняет задачу; при ошибке откладывает повтор или помечает её.
+
+    Функции after_commit вызываются после фиксации транзакции и только
+    при успехе. Строка задачи удаляется в той же транзакции, что и изменения
+    задачи, только пока locked_at не сменился. Если задачу забрал
+    другой воркер, этот запуск откатывается, поэтому счётчики и прочие
+    изменения в базе применяются ровно один раз.
+    """
+    func = registry.get(job.name)
+    mine = Task.objects.filter(pk=job.pk, locked_at=job.locked_at)
+    _deferred.callbacks = []
+    try:
+        if func is None:
+            raise KeyError(f'Задача {job.name} не зарегистрирована')
+        with transaction.atomic():
+            func(*json.loads(job.args))
+            if not mine.delete()[0]:
+                raise Reclaimed
+    except Reclaimed:
+        logger.warning('Задачу %s #%s выполнил другой воркер',
+                       job.name, job.pk)
+        return False
+    except Exception:
+        logger.exception('Задача %s #%s завершилась ошибкой',
+                         job.name, job.pk)
+        if func is None or job.attempts >= settings.TASKS_MAX_ATTEMPTS:
+            status, run_at = Task.FAILED, job.run_at
+        else:
+            # Экспоненциальная пауза: 1, 2, 4... интервала TASKS_RETRY_DELAY
+            status, run_at = Task.QUEUED, timezone.now() + timedelta(
+                seconds=settings.TASKS_RETRY_DELAY * 2 ** (job.attempts - 1))
+        mine.update(status=status, run_at=run_at,
+                    last_error=traceback.format_exc())
+        return False
+    finally:
+        callbacks, _deferred.callbacks = _deferred.callbacks, None
+    for callback, args in callbacks:
+        try:
+            callback(*args)
+        except Exception:
+            logger.exception('Задача %s #%s: ошибка после фиксации',
+                             job.name, job.pk)
+    return True
+
+
+def run_pending(limit=None):
+    """Выполняет готовые задачи, возвращает (успешных, с ошибкой)."""
+    done = failed = 0
+    while limit is None or done + failed < limit:
+        job = claim()
+        if job is None:
+            break
+        if run(job):
+            done += 1
+        else:
+            failed += 1
+    return done, failed
+
+
+@task
+def send_email(messages):
+    """Отправляет письма бэкендом TASKS_EMAIL_BACKEND."""
+    emails = []
+    for data in messages:
+        alternatives = data.pop('alternatives')
+        email = EmailMultiAlternatives(**data) if alternatives else (
+            EmailMessage(**data))
+        for content, mimetype in alternatives:
+            email.attach_alternative(content, mimetype)
+        emails.append(email)
+    get_connection(settings.TASKS_EMAIL_BACKEND).send_messages(emails)
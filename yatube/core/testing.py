@@ -0,0 +1,28 @@
+"""Тесты выполняют задачи core.tasks сразу, без воркера.
+
+Кэш в тестах свой у каждого процесса: общий кэш разработки хранил бы
+поколения и подсчёты между запусками, а база каждый раз создаётся
+заново.
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_SETTINGS = {
+    'TASKS_EAGER': True,
+    'CACHES': {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    },
+}
+
+
+class EagerTasksRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.eager_tasks = override_settings(**TEST_SETTINGS)
+        self.eager_tasks.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.eager_tasks.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,428 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+from urllib.parse import unquote
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, FeedEntry, Follow, Post, UserStats
+
+from . import loadtest, routing, tasks
+from .asgi import WsgiToAsgi
+from .models import Task
+from .dbcopy import sqlite_source
+from .sqlite import ROLLBACK_PRAGMAS, WAL_PRAGMAS, measure
+
+User = get_user_model()
+
+
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.create(text='Пост', author=cls.author)
+
+    def test_disabled_by_default(self):
+        """Без настройки и заголовка замеры не выполняются."""
+        response = self.client.get(reverse('posts:index'),
+                                   HTTP_X_PROFILE='1')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(PROFILING_ALLOW_HEADER=True)
+    def test_enabled_by_header(self):
+        """Заголовок X-Profile включает Server-Timing и запись в лог."""
+        with self.assertLogs('core.profiling', 'INFO') as logs:
+            response = self.client.get(
+                reverse('posts:profile', kwargs={'username': 'author'}),
+                HTTP_X_PROFILE='1')
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('total;dur=', timing)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'posts:profile')
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertEqual(record['response_bytes'], len(response.content))
+
+    @override_settings(PROFILING_ENABLED=True)
+    def test_enabled_by_settings(self):
+        """Настройка PROFILING_ENABLED включает замеры для всех запросов."""
+        with self.assertLogs('core.profiling', 'INFO'):
+            response = self.client.get(reverse('posts:index'))
+        self.assertTrue(response.has_header('Server-Timing'))
+
+
+class CopyDatabaseTests(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        # bulk_create не отправляет сигналы, которые пишут в базу default
+        with sqlite_source(self.path, 'old') as alias:
+            call_command('migrate', database=alias, verbosity=0)
+            User.objects.using(alias).bulk_create([User(username='author')])
+            author = User.objects.using(alias).get()
+            Post.objects.using(alias).bulk_create(
+                Post(text=f'Пост {number}', author=author)
+                for number in range(5))
+            Comment.objects.using(alias).bulk_create([Comment(
+                post=Post.objects.using(alias).first(), author=author,
+                text='Комментарий')])
+            UserStats.objects.using(alias).create(
+                user=author, posts_count=5)
+            self.dates = list(Post.objects.using(alias).values_list(
+                'pk', 'pub_date'))
+        User.objects.create_user(username='replaced')
+
+    def test_copy_database(self):
+        """Данные из файла SQLite заменяют данные целевой базы."""
+        out = StringIO()
+        call_command('copy_database', self.path, '--no-input',
+                     '--batch-size', '2', stdout=out)
+        self.assertEqual(
+            list(User.objects.values_list('username', flat=True)),
+            ['author'])
+        self.assertEqual(
+            list(Post.objects.values_list('pk', 'pub_date')), self.dates)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(UserStats.objects.get().posts_count, 5)
+        self.assertIn('posts.Post: 5', out.getvalue())
+
+    def test_unmigrated_source(self):
+        """Файл старой схемы переносится только после миграций."""
+        with sqlite_source(self.path, 'old') as alias:
+            call_command('migrate', 'posts', '0001', database=alias,
+                         verbosity=0)
+        with self.assertRaisesMessage(CommandError, '--migrate'):
+            call_command('copy_database', self.path, '--no-input',
+                         stdout=StringIO())
+        self.assertTrue(User.objects.filter(username='replaced').exists())
+        call_command('copy_database', self.path, '--no-input', '--migrate',
+                     stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 5)
+
+
+class SqlitePragmasTests(TestCase):
+    def connect(self):
+        handle, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        for suffix in ('-wal', '-shm'):
+            self.addCleanup(self.remove, path + suffix)
+        return sqlite_source(path)
+
+    @staticmethod
+    def remove(path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    @override_settings(SQLITE_PRAGMAS={**settings.SQLITE_PRAGMAS,
+                                       **WAL_PRAGMAS})
+    def test_new_connections_use_wal(self):
+        """Новые соединения SQLite получают прагмы из настроек."""
+        with self.connect() as alias:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                self.assertEqual(cursor.fetchone()[0], 'wal')
+                cursor.execute('PRAGMA synchronous')
+                # 1 соответствует NORMAL
+                self.assertEqual(cursor.fetchone()[0], 1)
+
+    @override_settings(SQLITE_PRAGMAS={'synchronous': 'full'})
+    def test_journal_mode_is_opt_in(self):
+        """Без SQLITE_JOURNAL_MODE режим журнала в файле не меняется."""
+        with self.connect() as alias:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                self.assertEqual(cursor.fetchone()[0], 'delete')
+
+    def test_benchmark_measures_both_modes(self):
+        """Замер возвращает чтения и записи в секунду."""
+        for pragmas in (ROLLBACK_PRAGMAS, WAL_PRAGMAS):
+            result = measure(pragmas, readers=2, duration=0.2, rows=100)
+            self.assertGreater(result['reads_per_second'], 0)
+            self.assertGreater(result['writes_per_second'], 0)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def read_aliases(self, method, url, **data):
+        """Базы, которые выбрал бы роутер для чтений запроса."""
+        aliases = []
+
+        def db_for_read(router, model, **hints):
+            aliases.append(routing.current())
+
+        with mock.patch.object(routing.ReplicaRouter, 'db_for_read',
+                               autospec=True, side_effect=db_for_read):
+            response = getattr(self.client, method)(url, data)
+        return response, set(aliases)
+
+    def test_read_views_use_replica(self):
+        """Страницы-списки читают из реплики, остальные из default."""
+        _, aliases = self.read_aliases('get', reverse('posts:index'))
+        self.assertEqual(aliases, {'replica'})
+        _, aliases = self.read_aliases('get', reverse('posts:post_create'))
+        self.assertEqual(aliases, {None})
+        self.assertIsNone(routing.current())
+
+    def test_write_pins_to_primary(self):
+        """После записи браузер читает из default до конца окна."""
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.id})
+        response, aliases = self.read_aliases('post', url, text='Текст')
+        self.assertEqual(aliases, {None})
+        self.assertIn('primary_pin', response.cookies)
+        _, aliases = self.read_aliases('get', reverse('posts:index'))
+        self.assertEqual(aliases, {None})
+        self.client.cookies['primary_pin'] = '0'
+        _, aliases = self.read_aliases('get', reverse('posts:index'))
+        self.assertEqual(aliases, {'replica'})
+
+    def test_get_write_pins_to_primary(self):
+        """Подписка по GET тоже закрепляет браузер, чтение — нет."""
+        response, _ = self.read_aliases('get', reverse('posts:index'))
+        self.assertNotIn('primary_pin', response.cookies)
+        reader = User.objects.create_user(username='reader')
+        self.client.force_login(reader)
+        response = self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'author'}))
+        self.assertIn('primary_pin', response.cookies)
+        _, aliases = self.read_aliases('get', reverse('posts:index'))
+        self.assertEqual(aliases, {None})
+
+    def test_router_sends_writes_to_default(self):
+        """Запись и миграции идут только в основную базу."""
+        router = routing.ReplicaRouter()
+        routing.set_current('replica')
+        try:
+            self.assertEqual(router.db_for_read(Post), 'replica')
+            self.assertEqual(router.db_for_write(Post), 'default')
+        finally:
+            routing.set_current(None)
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
+
+
+FAILURES = []
+COMMITTED = []
+
+
+@tasks.task
+def deferring_task(fail):
+    # Колбэк запоминает, видна ли ещё строка задачи, то есть вызван ли
+    # он до выхода из транзакции run()
+    tasks.after_commit(lambda: COMMITTED.append(Task.objects.exists()))
+    if fail:
+        raise RuntimeError('Ошибка задачи')
+
+
+@tasks.task
+def flaky_task(failures):
+    # Падает failures раз подряд, затем выполняется
+    if len(FAILURES) < failures:
+        FAILURES.append(failures)
+        raise RuntimeError('Временная ошибка')
+
+
+@override_settings(TASKS_EAGER=False, TASKS_RETRY_DELAY=0)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        FAILURES.clear()
+        COMMITTED.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        call_command('run_tasks', once=True, stdout=StringIO())
+
+    def test_write_only_enqueues(self):
+        """Запись поста — один INSERT задачи, остальное делает воркер."""
+        with self.assertNumQueries(2):
+            post = Post.objects.create(text='Пост', author=self.author)
+        self.assertEqual(Task.objects.get().name, 'posts.tasks.post_created')
+        self.assertEqual(self.author.stats.posts_count, 0)
+        out = StringIO()
+        call_command('run_tasks', once=True, stdout=out)
+        self.assertIn('Выполнено задач: 1', out.getvalue())
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 1)
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.reader, post=post).exists())
+
+    def test_retries_then_fails(self):
+        """Ошибка откладывает задачу, после TASKS_MAX_ATTEMPTS — отказ."""
+        flaky_task.delay(1)
+        with self.assertLogs('core.tasks', 'ERROR'):
+            self.assertEqual(tasks.run_pending(), (1, 1))
+        self.assertFalse(Task.objects.exists())
+        with self.settings(TASKS_MAX_ATTEMPTS=2), \
+                self.assertLogs('core.tasks', 'ERROR') as logs:
+            flaky_task.delay(5)
+            self.assertEqual(tasks.run_pending(), (0, 2))
+        self.assertEqual(len(logs.records), 2)
+        job = Task.objects.get()
+        self.assertEqual(job.status, Task.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIn('Временная ошибка', job.last_error)
+
+    def test_reclaimed_task_applies_once(self):
+        """Запуск, у которого задачу забрал другой воркер, откатывается."""
+        Post.objects.create(text='Пост', author=self.author)
+        job = tasks.claim()
+        Task.objects.filter(pk=job.pk).update(locked_at=timezone.now())
+        with self.assertLogs('core.tasks', 'WARNING'):
+            self.assertFalse(tasks.run(job))
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 0)
+        with self.settings(TASKS_LOCK_TIMEOUT=-1):
+            self.assertEqual(tasks.run_pending(), (1, 0))
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 1)
+
+    def test_after_commit_runs_after_transaction(self):
+        """Колбэки after_commit вызываются после транзакции и при успехе."""
+        deferring_task.delay(True)
+        with self.assertLogs('core.tasks', 'ERROR'):
+            tasks.run_pending()
+        self.assertEqual(COMMITTED, [])
+        Task.objects.all().delete()
+        deferring_task.delay(False)
+        tasks.run_pending()
+        self.assertEqual(COMMITTED, [False])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_queue_requires_shared_cache(self):
+        """Очередь без TASKS_EAGER не запускается с кэшем процесса."""
+        with self.assertRaises(ImproperlyConfigured):
+            tasks.check_cache()
+        with self.settings(TASKS_EAGER=True):
+            tasks.check_cache()
+
+    def test_stale_running_task_is_reclaimed(self):
+        """Задачу упавшего воркера забирает другой."""
+        job = flaky_task.delay(0)
+        Task.objects.filter(pk=job.pk).update(status=Task.RUNNING,
+                                              locked_at=job.created)
+        self.assertIsNone(tasks.claim())
+        with self.settings(TASKS_LOCK_TIMEOUT=-1):
+            self.assertEqual(tasks.claim().pk, job.pk)
+
+    @override_settings(
+        EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+        TASKS_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_queued_email(self):
+        """Письма отправляются воркером."""
+        mail.send_mail('Тема', 'Текст', 'from@example.com',
+                       ['to@example.com'])
+        self.assertEqual(len(mail.outbox), 0)
+        tasks.run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Тема')
+
+
+def echo_application(environ, start_response):
+    body = environ['wsgi.input'].read(int(environ.get('CONTENT_LENGTH') or 0))
+    start_response('201 Created', [('Content-Type', 'text/plain'),
+                                   ('X-Path', environ['PATH_INFO'])])
+    return [environ.get('HTTP_X_NAME', '').encode(), b':', body]
+
+
+def asgi_request(application, path, method='GET', body=b'', headers=()):
+    """Выполняет один запрос к ASGI-приложению, возвращает сообщения."""
+    scope = {'type': 'http', 'method': method, 'path': path,
+             'query_string': b'', 'headers': list(headers)}
+    incoming = [{'type': 'http.request', 'body': body[:2],
+                 'more_body': True},
+                {'type': 'http.request', 'body': body[2:]}]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+class AsgiTests(TestCase):
+    def test_wsgi_adapter(self):
+        """Адаптер передаёт тело, заголовки и статус ответа."""
+        sent = asgi_request(WsgiToAsgi(echo_application, threads=1),
+                            '/echo/', 'POST', b'body',
+                            [(b'x-name', b'yatube')])
+        self.assertEqual(sent[0]['status'], 201)
+        self.assertIn((b'x-path', b'/echo/'), sent[0]['headers'])
+        self.assertEqual(b''.join(message.get('body', b'')
+                                  for message in sent[1:]),
+                         b'yatube:body')
+        self.assertFalse(sent[-1].get('more_body'))
+
+    def test_django_application(self):
+        """Проект отвечает через ASGI."""
+        sent = asgi_request(WsgiToAsgi(get_wsgi_application(), threads=1),
+                            reverse('about:tech'))
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn('Технологии'.encode(), b''.join(
+            message.get('body', b'') for message in sent[1:]))
+
+    def test_non_ascii_path(self):
+        """Путь с кириллицей доходит до Django без ошибки кодировки."""
+        # В ASGI path уже декодирован, в отличие от reverse()
+        path = unquote(reverse('posts:profile', kwargs={'username': 'иван'}))
+        sent = asgi_request(WsgiToAsgi(echo_application, threads=1), path)
+        self.assertIn((b'x-path', path.encode()), sent[0]['headers'])
+        # Пользователя нет в базе потока пула: важно, что ответ пришёл
+        sent = asgi_request(WsgiToAsgi(get_wsgi_application(), threads=1),
+                            path)
+        self.assertEqual(sent[0]['status'], 404)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class LoadTestTests(TestCase):
+    def test_measures_server(self):
+        """Замер считает запросы и задержки работающего сервера."""
+        server = make_server('127.0.0.1', 0, echo_application,
+                             handler_class=QuietHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            result = loadtest.run(
+                f'http://127.0.0.1:{server.server_port}', ['/'],
+                concurrency=1, duration=0.3)
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        self.assertGreater(result['requests'], 0)
+        self.assertEqual(result['errors'], 0)
+        self.assertLessEqual(result['latency_ms']['p50'],
+                             result['latency_ms']['p99'])
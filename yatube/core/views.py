@@ -1,4 +1,5 @@
 from django.shortcuts import render
+from django.views.decorators.cache import never_cache
 
 
 def page_not_found(request, exception):
@@ -13,3 +14,10 @@ def csrf_failure(request, reason=''):
 
 def internal_error(request,):
     return render(request, 'core/500.html')
+
+
+@never_cache
+def header_fragment(request):
+    # Пункт меню текущей страницы приходит параметром из <esi:include>
+    return render(request, 'includes/header.html',
+                  {'active_view': request.GET.get('view', '')})
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import search
 from .models import Post, Comment
 from .models import Group
 
@@ -17,6 +18,13 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по индексу вместо LIKE '%...%' по всей таблице постов
+        if not search_term:
+            return queryset, False
+        matches = search.search(search_term).values('pk')
+        return queryset.filter(pk__in=matches), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = (
@@ -0,0 +1,255 @@
+"""Нагрузочный стенд для страниц posts и users.
+
+Заполняет базу синтетическими данными и для каждого адреса измеряет
+число SQL-запросов, время ответа и пиковый объём выделенной памяти.
+Используется командой benchmark_views.
+"""
+import random
+import statistics
+import time
+import tracemalloc
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import feed
+from .counters import recount_all
+from .models import Comment, Follow, Group, Post, User
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+BATCH_SIZE = 1000
+
+
+def _bulk(model, objects):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+
+def seed(users=2000, posts=200000, follows=50, groups=20, comments=3,
+         seed_value=0):
+    """Заполняет базу: пользователи, группы, посты, подписки, комментарии.
+
+    Пишет пакетами через bulk_create, после чего пересчитывает счётчики
+    и ленты подписок, которые bulk_create обходит.
+    """
+    rnd = random.Random(seed_value)
+    password = make_password(BENCHMARK_PASSWORD)
+    _bulk(User, (
+        User(username=f'bench_user_{i}', first_name='Bench',
+             last_name=str(i), password=password)
+        for i in range(users)
+    ))
+    _bulk(Group, (
+        Group(title=f'Группа {i}', slug=f'bench-group-{i}',
+              description='Группа нагрузочного стенда')
+        for i in range(groups)
+    ))
+    user_ids = list(User.objects.filter(
+        username__startswith='bench_user_').values_list('id', flat=True))
+    group_ids = list(Group.objects.filter(
+        slug__startswith='bench-group-').values_list('id', flat=True))
+
+    _bulk(Post, (
+        Post(text=f'Пост нагрузочного стенда {i}',
+             author_id=rnd.choice(user_ids),
+             group_id=rnd.choice(group_ids + [None]))
+        for i in range(posts)
+    ))
+    edges = set()
+    for user_id in user_ids:
+        for author_id in rnd.sample(user_ids, min(follows, len(user_ids))):
+            if author_id != user_id:
+                edges.add((user_id, author_id))
+    _bulk(Follow, (
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id, author_id in edges
+    ))
+    for user_id, author_id in edges:
+        feed.backfill(user_id, author_id)
+
+    post_ids = Post.objects.filter(
+        author_id__in=user_ids).values_list('id', flat=True)
+    _bulk(Comment, (
+        Comment(post_id=post_id, author_id=rnd.choice(user_ids),
+                text='Комментарий нагрузочного стенда')
+        for post_id in post_ids.iterator()
+        for _ in range(rnd.randint(0, comments))
+    ))
+    recount_all()
+
+
+POST_TEXT = 'Пост из нагрузочного стенда'
+COMMENT_TEXT = 'Комментарий из нагрузочного стенда'
+
+
+def _scenarios():
+    """Адреса для замера: (имя, метод, url, данные, нужен ли вход).
+
+    Третьим значением возвращает {имя: функция}: она перед каждым
+    запросом возвращает данные, которые сценарий меняет, в исходное
+    состояние.
+    """
+    author = User.objects.filter(
+        username__startswith='bench_user_').order_by('id').first()
+    group = Group.objects.filter(
+        slug__startswith='bench-group-').order_by('id').first()
+    post = Post.objects.filter(author=author).order_by('-pub_date').first()
+    other = User.objects.filter(
+        username__startswith='bench_user_').order_by('-id').first()
+    deep_page = max(Post.objects.count() // 10 // 2, 1)
+    scenarios = [
+        ('posts:index', 'get', reverse('posts:index'), None, False),
+        ('posts:index deep page', 'get', reverse('posts:index'),
+         {'page': deep_page}, False),
+        ('posts:index cursor', 'get', reverse('posts:index'),
+         {'cursor': ''}, False),
+        ('posts:group_list', 'get',
+         reverse('posts:group_list', kwargs={'slug': group.slug}),
+         None, False),
+        ('posts:profile', 'get',
+         reverse('posts:profile', kwargs={'username': author.username}),
+         None, True),
+        ('posts:post_detail', 'get',
+         reverse('posts:post_detail', kwargs={'post_id': post.id}),
+         None, False),
+        ('posts:post_create', 'get', reverse('posts:post_create'),
+         None, True),
+        ('posts:post_create submit', 'post', reverse('posts:post_create'),
+         {'text': POST_TEXT}, True),
+        ('posts:post_edit', 'get',
+         reverse('posts:post_edit', kwargs={'post_id': post.id}),
+         None, True),
+        ('posts:add_comment', 'post',
+         reverse('posts:add_comment', kwargs={'post_id': post.id}),
+         {'text': COMMENT_TEXT}, True),
+        ('posts:follow_index', 'get', reverse('posts:follow_index'),
+         None, True),
+        ('posts:profile_follow', 'get',
+         reverse('posts:profile_follow',
+                 kwargs={'username': other.username}), None, True),
+        ('posts:profile_unfollow', 'get',
+         reverse('posts:profile_unfollow',
+                 kwargs={'username': other.username}), None, True),
+        ('users:signup', 'get', reverse('users:signup'), None, False),
+        ('users:login', 'get', reverse('users:login'), None, False),
+        ('users:login submit', 'post', reverse('users:login'),
+         {'username': author.username, 'password': BENCHMARK_PASSWORD},
+         False),
+        ('users:password_change', 'get', reverse('users:password_change'),
+         None, True),
+        ('users:password_reset_form', 'post',
+         reverse('users:password_reset_form'),
+         {'email': 'nobody@example.com'}, False),
+        ('users:logout', 'get', reverse('users:logout'), None, True),
+    ]
+    resets = {
+        'posts:post_create submit': lambda: Post.objects.filter(
+            author=author, text=POST_TEXT).delete(),
+        'posts:add_comment': lambda: Comment.objects.filter(
+            post=post, author=author, text=COMMENT_TEXT).delete(),
+        'posts:profile_follow': lambda: Follow.objects.filter(
+            user=author, author=other).delete(),
+        'posts:profile_unfollow': lambda: Follow.objects.get_or_create(
+            user=author, author=other),
+    }
+    return scenarios, author, resets
+
+
+def measure(make_client, method, url, data=None, repeat=5, warm=False,
+            reset=None):
+    """Замеряет один адрес repeat раз и сводит результаты.
+
+    Каждый запрос делает новый клиент make_client() после reset(), чтобы
+    повторы сценариев, меняющих данные или сессию (выход, подписка,
+    новый пост), шли по тому же пути, что и первый. Пиковая память
+    снимается отдельным запросом после замеров времени: под tracemalloc
+    каждое выделение памяти заметно дороже.
+    """
+    def prepare():
+        if reset is not None:
+            reset()
+        if not warm:
+            cache.clear()
+        return getattr(make_client(), method)
+
+    timings = []
+    for _ in range(repeat):
+        send = prepare()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = send(url, data)
+            timings.append((time.perf_counter() - started) * 1000)
+    send = prepare()
+    tracemalloc.start()
+    send(url, data)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    if reset is not None:
+        reset()
+    statements = [query['sql'] for query in queries.captured_queries]
+    return {
+        'status': response.status_code,
+        'queries': len(statements),
+        'duplicate_queries': sum(
+            count - 1 for count in Counter(statements).values()),
+        'sql_ms': round(sum(
+            float(query['time']) for query in queries.captured_queries
+        ) * 1000, 3),
+        'time_ms': {
+            'min': round(min(timings), 3),
+            'median': round(statistics.median(timings), 3),
+            'max': round(max(timings), 3),
+        },
+        'peak_memory_kb': round(peak_memory / 1024, 1),
+        'response_bytes': len(response.content),
+    }
+
+
+def run(repeat=5, warm=False):
+    """Проходит все сценарии и возвращает список результатов."""
+    scenarios, author, resets = _scenarios()
+    results = []
+    for name, method, url, data, login in scenarios:
+        def make_client(login=login):
+            client = Client()
+            if login:
+                client.force_login(author)
+            return client
+
+        result = {'name': name, 'method': method.upper(), 'url': url}
+        result.update(measure(make_client, method, url, data, repeat, warm,
+                              resets.get(name)))
+        results.append(result)
+    return results
+
+
+def compare(previous, current):
+    """Сравнивает два отчёта; возвращает строки различий и регрессии."""
+    previous = {item['name']: item for item in previous['results']}
+    lines, regressions = [], []
+    for item in current['results']:
+        old = previous.get(item['name'])
+        if old is None:
+            continue
+        query_delta = item['queries'] - old['queries']
+        old_median = old['time_ms']['median'] or 1
+        time_delta = (item['time_ms']['median'] - old_median) / old_median
+        lines.append(
+            f"{item['name']}: queries {old['queries']} -> "
+            f"{item['queries']}, median {old['time_ms']['median']} -> "
+            f"{item['time_ms']['median']} ms ({time_delta:+.0%})"
+        )
+        if query_delta > 0:
+            regressions.append(item['name'])
+    return lines, regressions
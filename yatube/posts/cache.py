@@ -0,0 +1,95 @@
+"""Поколения кэша страниц постов.
+
+Каждая область (главная, группа, автор, пост) хранит в кэше счётчик
+поколения. Фрагменты шаблонов кэшируются без срока жизни и включают
+поколение в ключ, поэтому изменение данных делает их недоступными
+сразу, а неизменившиеся страницы остаются в кэше сколько угодно.
+Рядом с поколением хранится время последнего перехода, из него
+строится заголовок Last-Modified.
+"""
+import time
+
+from django.core.cache import cache
+
+INDEX = 'index'
+# Данные, которые выводятся в карточках постов: имена авторов, группы
+RELATED = 'related'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def follow_scope(user_id):
+    # Подписки пользователя и подписчики автора
+    return f'follow:{user_id}'
+
+
+def _key(scope):
+    return f'posts:generation:{scope}'
+
+
+def _modified_key(scope):
+    return f'posts:modified:{scope}'
+
+
+def _initial():
+    # Начальное значение зависит от времени: если счётчик вытеснят из
+    # кэша, новое поколение не совпадёт ни с одним из прежних
+    return int(time.time() * 1000)
+
+
+def get_generations(*scopes):
+    """Возвращает {область: поколение}, создавая недостающие."""
+    keys = {_key(scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        cache.add(key, _initial(), None)
+        found[key] = cache.get(key)
+    return {keys[key]: value for key, value in found.items()}
+
+
+def cache_version(*scopes):
+    """Строка поколений для ключа фрагмента {% cache %}."""
+    generations = get_generations(*scopes)
+    return '-'.join(str(generations[scope]) for scope in scopes)
+
+
+def last_modified(*scopes):
+    """Время последнего изменения любой из областей (timestamp)."""
+    keys = [_modified_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in set(keys) - found.keys():
+        # Время изменения неизвестно: считаем, что область изменилась
+        # сейчас, и запоминаем это время для следующих запросов
+        cache.add(key, time.time(), None)
+        found[key] = cache.get(key)
+    return max(found.values())
+
+
+def bump(*scopes):
+    """Переводит области на новое поколение."""
+    for scope in scopes:
+        try:
+            cache.incr(_key(scope))
+        except ValueError:
+            cache.add(_key(scope), _initial(), None)
+    now = time.time()
+    cache.set_many(
+        {_modified_key(scope): now for scope in scopes}, None)
+
+
+def bump_post(post, previous_group_id=None):
+    """Инвалидирует все страницы, на которых виден пост."""
+    scopes = [INDEX, author_scope(post.author_id), post_scope(post.pk)]
+    for group_id in {post.group_id, previous_group_id} - {None}:
+        scopes.append(group_scope(group_id))
+    bump(*scopes)
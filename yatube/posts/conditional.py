@@ -0,0 +1,147 @@
+"""Условные GET-запросы для страниц постов.
+
+ETag строится из поколений кэша областей, которые выводит страница
+(posts.cache), поэтому меняется при любом изменении её данных, а
+проверка не требует отрисовки и почти не обращается к базе. Ответ 304
+отдаёт декоратор django.views.decorators.http.condition.
+
+edge_cache разрешает обратному прокси кэшировать страницы, которые
+не зависят от пользователя: страницы гостей, а при ESI_ENABLED все.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from . import cache
+from .models import Comment, Group, Post, User
+
+
+def index_scopes(request):
+    return [cache.INDEX, cache.RELATED]
+
+
+def group_scopes(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    if group_id is None:
+        return None
+    return [cache.group_scope(group_id), cache.RELATED]
+
+
+def profile_scopes(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if author_id is None:
+        return None
+    scopes = [cache.author_scope(author_id), cache.follow_scope(author_id),
+              cache.RELATED]
+    if not settings.ESI_ENABLED and request.user.is_authenticated:
+        # Кнопка «Подписаться» зависит от подписок читателя
+        scopes.append(cache.follow_scope(request.user.pk))
+    return scopes
+
+
+def post_scopes(request, post_id):
+    # В карточке выводится число постов автора
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True).first()
+    if author_id is None:
+        return None
+    return [cache.post_scope(post_id), cache.author_scope(author_id),
+            cache.RELATED]
+
+
+def comment_scopes(request, comment_id):
+    # Ветка меняется вместе с постом: ответы обновляют его область
+    post_id = Comment.objects.filter(pk=comment_id).values_list(
+        'post_id', flat=True).first()
+    if post_id is None:
+        return None
+    return post_scopes(request, post_id)
+
+
+def author_scopes(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if author_id is None:
+        return None
+    return [cache.author_scope(author_id), cache.RELATED]
+
+
+# Ленты принимают ещё и формат, но зависят от тех же областей
+def index_feed_scopes(request, feed_format):
+    return index_scopes(request)
+
+
+def group_feed_scopes(request, slug, feed_format):
+    return group_scopes(request, slug)
+
+
+def author_feed_scopes(request, username, feed_format):
+    return author_scopes(request, username)
+
+
+def _validators(scopes_func, personal, request, *args, **kwargs):
+    # Оба валидатора считаются один раз за запрос
+    if not hasattr(request, '_page_validators'):
+        scopes = scopes_func(request, *args, **kwargs)
+        if scopes is None:
+            # Объекта нет: представление само ответит 404
+            request._page_validators = (None, None)
+            return request._page_validators
+        generations = cache.get_generations(*scopes)
+        # Страница различается по пользователю и параметрам запроса;
+        # с ESI пользовательские части приходят отдельными фрагментами
+        personal = personal and not settings.ESI_ENABLED
+        user_id = request.user.pk if personal else None
+        etag = hashlib.md5(repr((
+            sorted(generations.items()),
+            user_id,
+            request.get_full_path(),
+        )).encode()).hexdigest()
+        modified = None
+        if not personal or not request.user.is_authenticated:
+            # Для вошедших Last-Modified не учитывает смену сессии,
+            # поэтому им достаточно ETag
+            modified = datetime.fromtimestamp(
+                cache.last_modified(*scopes), timezone.utc)
+        request._page_validators = (etag, modified)
+    return request._page_validators
+
+
+def page_condition(scopes_func, personal=True):
+    """Декоратор: ETag и Last-Modified по областям scopes_func.
+
+    personal=False для ответов, которые не зависят от пользователя.
+    """
+    return condition(
+        etag_func=lambda request, *args, **kwargs: _validators(
+            scopes_func, personal, request, *args, **kwargs)[0],
+        last_modified_func=lambda request, *args, **kwargs: _validators(
+            scopes_func, personal, request, *args, **kwargs)[1],
+    )
+
+
+def edge_cache(view):
+    """Cache-Control и Vary для страниц постов."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if settings.ESI_ENABLED:
+            shared = True
+        else:
+            # Страница содержит шапку и формы текущего пользователя
+            patch_vary_headers(response, ('Cookie',))
+            shared = not request.user.is_authenticated
+        if shared and not response.cookies:
+            # Браузер каждый раз сверяет ETag, прокси хранит страницу
+            patch_cache_control(response, public=True, max_age=0,
+                                s_maxage=settings.EDGE_CACHE_SECONDS)
+        else:
+            patch_cache_control(response, private=True, max_age=0)
+        return response
+    return wrapper
@@ -1,3 +1,44 @@
 POSTS_PER_PAGE: int = 10
 POST_FIRST_CHARS_TITLE: int = 30
 POST_FIRST_CHARS_STR: int = 15
+CURSOR_PARAM: str = 'cursor'
+# Сколько ссылок на соседние страницы выводить по обе стороны от текущей
+PAGINATOR_WINDOW: int = 2
+# С какого размера таблицы число постов оценивается по статистике
+PAGINATOR_ESTIMATE_MIN: int = 100000
+FEED_BACKFILL_LIMIT: int = 1000
+FEED_BATCH_SIZE: int = 500
+# Размеры миниатюр, которые выводят шаблоны: (геометрия, параметры sorl)
+POST_IMAGE_SIZES: dict = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+# Ширины вариантов картинки для srcset и форматы в порядке предпочтения;
+# форматы, которые не поддерживает установленный Pillow, пропускаются
+POST_IMAGE_WIDTHS: tuple = (480, 960, 1440)
+POST_IMAGE_ASPECT: tuple = (960, 339)
+POST_IMAGE_FORMATS: dict = {
+    'AVIF': {'quality': 60},
+    'WEBP': {'quality': 75, 'method': 6},
+    'JPEG': {'quality': 80, 'optimize': True, 'progressive': True},
+}
+# Вес вхождения слова в текст поста и в комментарий к нему при поиске
+SEARCH_TEXT_WEIGHT: int = 2
+SEARCH_COMMENT_WEIGHT: int = 1
+SEARCH_TERM_MAX_LENGTH: int = 64
+SEARCH_BATCH_SIZE: int = 500
+TRANSFER_BATCH_SIZE: int = 2000
+TRANSFER_KEY_MAX_LENGTH: int = 255
+# Число последних постов в лентах Atom и JSON Feed
+FEED_ITEMS: int = 20
+# Дайджест подписок: сколько постов в письме, писем за один вызов
+# почтового бэкенда и насколько давние посты попадают в первое письмо
+DIGEST_MAX_POSTS: int = 20
+DIGEST_BATCH_SIZE: int = 100
+DIGEST_LOOKBACK_HOURS: int = 24
+# Комментарии: корневых на страницу, сколько ответов в ветке выводится
+# сразу под корнем, глубина вложенности и цифр на id в пути ветки
+COMMENTS_PER_PAGE: int = 20
+COMMENT_INLINE_REPLIES: int = 10
+COMMENT_MAX_DEPTH: int = 8
+COMMENT_PATH_WIDTH: int = 10
+COMMENT_PATH_MAX_LENGTH: int = 255
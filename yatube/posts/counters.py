@@ -0,0 +1,71 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def change(queryset, field: str, delta: int):
+    """Атомарно меняет счётчик, не опуская его ниже нуля."""
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def user_stats(user) -> UserStats:
+    """Счётчики пользователя; отсутствующие пересчитываются на лету."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        recount_users(User.objects.filter(pk=user.pk))
+        # Строка только что записана, реплика может её ещё не видеть
+        return UserStats.objects.using(DEFAULT_DB_ALIAS).get(user=user)
+
+
+def _count(queryset, field: str):
+    """Подзапрос числа строк queryset, сгруппированных по field."""
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+        field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def recount_users(users=None):
+    users = User.objects.all() if users is None else users
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=pk) for pk in users.filter(
+            stats__isnull=True).values_list('pk', flat=True).iterator()],
+        ignore_conflicts=True,
+    )
+    UserStats.objects.filter(user__in=users.values('pk')).update(
+        posts_count=_count(Post.objects.all(), 'author'),
+        followers_count=_count(Follow.objects.all(), 'author'),
+        following_count=_count(Follow.objects.all(), 'user'),
+    )
+
+
+def recount_groups(groups=None):
+    groups = Group.objects.all() if groups is None else groups
+    groups.update(posts_count=_count(Post.objects.all(), 'group'))
+
+
+def recount_posts(posts=None):
+    posts = Post.objects.all() if posts is None else posts
+    posts.update(comments_count=_count(Comment.objects.all(), 'post'))
+
+
+def recount_replies(comments=None):
+    """Пересчитывает ответы в ветках: потомков, чей путь продолжает путь."""
+    comments = Comment.objects.all() if comments is None else comments
+    descendants = Comment.objects.filter(
+        post=OuterRef('post'), path__startswith=OuterRef('path')).exclude(
+        pk=OuterRef('pk')).order_by().values('post').annotate(
+        total=Count('pk')).values('total')
+    comments.update(replies_count=Coalesce(
+        Subquery(descendants, output_field=IntegerField()), 0))
+
+
+def recount_all():
+    recount_users()
+    recount_groups()
+    recount_posts()
+    recount_replies()
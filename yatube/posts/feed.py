@@ -0,0 +1,50 @@
+from .constants import FEED_BACKFILL_LIMIT, FEED_BATCH_SIZE
+from .models import FeedEntry, Follow, Post
+
+
+def _bulk_insert(entries):
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= FEED_BATCH_SIZE:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(post: Post):
+    """Добавляет пост в ленты всех подписчиков автора."""
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    _bulk_insert(
+        FeedEntry(user_id=user_id, post_id=post.id,
+                  author_id=post.author_id, pub_date=post.pub_date)
+        for user_id in follower_ids.iterator()
+    )
+
+
+def backfill(user_id: int, author_id: int):
+    """Переносит в ленту подписчика последние посты автора."""
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date').values_list('id', 'pub_date')[:FEED_BACKFILL_LIMIT]
+    _bulk_insert(
+        FeedEntry(user_id=user_id, post_id=post_id,
+                  author_id=author_id, pub_date=pub_date)
+        for post_id, pub_date in posts
+    )
+
+
+def trim(user_id: int, author_id: int):
+    """Убирает из ленты подписчика посты автора."""
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild(follows=None):
+    """Заполняет ленты по подпискам follows; без них — все ленты заново."""
+    if follows is None:
+        FeedEntry.objects.all().delete()
+        follows = Follow.objects.all()
+    edges = follows.order_by().values_list('user_id', 'author_id')
+    for user_id, author_id in edges.iterator():
+        backfill(user_id, author_id)
@@ -0,0 +1,124 @@
+"""Варианты картинок постов для адаптивной выдачи через srcset."""
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .constants import (POST_IMAGE_ASPECT, POST_IMAGE_FORMATS,
+                        POST_IMAGE_WIDTHS)
+from .models import ImageVariant
+
+EXTENSIONS = {'AVIF': 'avif', 'WEBP': 'webp', 'JPEG': 'jpg'}
+MIME_TYPES = {'AVIF': 'image/avif', 'WEBP': 'image/webp',
+              'JPEG': 'image/jpeg'}
+
+
+def supported_formats():
+    Image.init()
+    return [name for name in POST_IMAGE_FORMATS if name in Image.SAVE]
+
+
+def _target_widths(source_width):
+    # Увеличивать картинку имеет смысл только до самой узкой ширины
+    widths = [width for width in POST_IMAGE_WIDTHS if width <= source_width]
+    return widths or [POST_IMAGE_WIDTHS[0]]
+
+
+def variants_dir(post_id):
+    return f'posts/variants/{post_id}'
+
+
+def delete_variants(variants):
+    """Удаляет варианты вместе с их файлами в хранилище."""
+    for variant in variants:
+        variant.image.delete(save=False)
+    variants.delete()
+
+
+def clear_variants(post):
+    delete_variants(post.image_variants.all())
+
+
+def clear_stale_variants(post_id, source):
+    """Удаляет варианты поста, созданные не из картинки source."""
+    delete_variants(
+        ImageVariant.objects.filter(post_id=post_id).exclude(source=source))
+
+
+def delete_variant_files(post_id):
+    """Удаляет файлы вариантов удалённого поста.
+
+    Строки вариантов к этому моменту уже удалены каскадом, поэтому файлы
+    ищутся по каталогу поста в хранилище.
+    """
+    directory = variants_dir(post_id)
+    try:
+        _, names = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in names:
+        default_storage.delete(f'{directory}/{name}')
+
+
+def build_variants(post):
+    """Пересоздаёт варианты картинки поста во всех ширинах и форматах."""
+    clear_variants(post)
+    if not post.image:
+        return []
+    with post.image.open('rb') as source_file:
+        source = Image.open(source_file)
+        source = ImageOps.exif_transpose(source).convert('RGB')
+    aspect_width, aspect_height = POST_IMAGE_ASPECT
+    stem = os.path.splitext(os.path.basename(post.image.name))[0]
+    variants = []
+    for width in _target_widths(source.width):
+        height = round(width * aspect_height / aspect_width)
+        resized = ImageOps.fit(source, (width, height), Image.LANCZOS)
+        for image_format in supported_formats():
+            buffer = BytesIO()
+            resized.save(buffer, image_format,
+                         **POST_IMAGE_FORMATS[image_format])
+            name = default_storage.save(
+                f'{variants_dir(post.pk)}/{stem}_{width}.'
+                f'{EXTENSIONS[image_format]}',
+                ContentFile(buffer.getvalue()),
+            )
+            variants.append(ImageVariant(
+                post=post, source=post.image.name, image=name,
+                format=image_format, width=width, height=height,
+                size=buffer.tell(),
+            ))
+    return ImageVariant.objects.bulk_create(variants)
+
+
+def picture_sources(post):
+    """Данные для <picture> по актуальным вариантам картинки поста.
+
+    Возвращает None, если варианты ещё не созданы или устарели.
+    """
+    by_format = {}
+    for variant in post.image_variants.all():
+        if variant.source == post.image.name:
+            by_format.setdefault(variant.format, []).append(variant)
+    if not by_format:
+        return None
+    srcsets = {
+        image_format: ', '.join(
+            f'{variant.image.url} {variant.width}w' for variant in variants)
+        for image_format, variants in by_format.items()
+    }
+    fallback_format = 'JPEG' if 'JPEG' in by_format else next(iter(by_format))
+    fallback = by_format[fallback_format]
+    default_width = POST_IMAGE_ASPECT[0]
+    src = [variant for variant in fallback if variant.width <= default_width]
+    return {
+        'sources': [
+            (MIME_TYPES[image_format], srcsets[image_format])
+            for image_format in POST_IMAGE_FORMATS
+            if image_format in by_format and image_format != fallback_format
+        ],
+        'srcset': srcsets[fallback_format],
+        'img': src[-1] if src else fallback[0],
+    }
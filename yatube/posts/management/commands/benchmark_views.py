@@ -0,0 +1,81 @@
+import json
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from posts import benchmarks
+
+
+class Command(BaseCommand):
+    help = ('Заполняет временную базу синтетическими данными и замеряет '
+            'запросы, время и память для страниц posts и users')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--posts', type=int, default=200000)
+        parser.add_argument('--follows', type=int, default=50,
+                            help='Подписок на одного пользователя')
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--comments', type=int, default=3,
+                            help='Максимум комментариев к посту')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--warm', action='store_true',
+                            help='Не очищать кэш перед каждым замером')
+        parser.add_argument('--output', default='benchmark.json',
+                            help='Файл отчёта в формате JSON')
+        parser.add_argument('--compare',
+                            help='Отчёт предыдущего релиза для сравнения')
+
+    def handle(self, *args, **options):
+        # Замеры идут во временной тестовой базе, рабочие данные не трогаем
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True)
+        try:
+            self.stdout.write('Заполняем базу...')
+            benchmarks.seed(
+                users=options['users'], posts=options['posts'],
+                follows=options['follows'], groups=options['groups'],
+                comments=options['comments'],
+            )
+            self.stdout.write('Замеряем страницы...')
+            results = benchmarks.run(options['repeat'], options['warm'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'dataset': {key: options[key] for key in (
+                    'users', 'posts', 'follows', 'groups', 'comments')},
+                'repeat': options['repeat'],
+                'warm_cache': options['warm'],
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        for item in results:
+            self.stdout.write(
+                f"{item['name']}: {item['status']}, "
+                f"{item['queries']} запросов, "
+                f"{item['time_ms']['median']} мс, "
+                f"{item['peak_memory_kb']} КБ"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Отчёт записан в {options['output']}"))
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as previous:
+                lines, regressions = benchmarks.compare(
+                    json.load(previous), report)
+            for line in lines:
+                self.stdout.write(line)
+            if regressions:
+                raise CommandError(
+                    'Выросло число запросов: ' + ', '.join(regressions))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts import cache
+from posts.images import build_variants
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт варианты картинок для уже опубликованных постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing', action='store_true',
+            help='Только для постов, у которых вариантов ещё нет',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only(
+            'pk', 'image', 'author_id', 'group_id').order_by('pk')
+        if options['missing']:
+            posts = posts.filter(image_variants__isnull=True)
+        built = 0
+        for post in posts.iterator():
+            if build_variants(post):
+                cache.bump_post(post)
+                built += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Варианты картинок созданы для постов: {built}'))
@@ -0,0 +1,54 @@
+import sys
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+from posts.constants import TRANSFER_BATCH_SIZE
+
+WRITERS = {'jsonl': transfer.write_jsonl, 'csv': transfer.write_csv}
+
+
+def counted(records, counter):
+    for record in records:
+        counter[record['type']] += 1
+        yield record
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, группы, посты, комментарии и '
+            'подписки в JSONL или CSV')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл выгрузки или - для stdout')
+        parser.add_argument('--format', choices=WRITERS,
+                            help='По умолчанию по расширению файла')
+        parser.add_argument('--batch-size', type=int,
+                            default=TRANSFER_BATCH_SIZE)
+        parser.add_argument('--images-dir',
+                            help='Каталог, куда скопировать картинки постов')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        data_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl')
+        if path == '-' and options['images_dir'] is None:
+            stream = sys.stdout
+        elif path == '-':
+            raise CommandError('Картинки не выгружаются в stdout')
+        else:
+            stream = open(path, 'w', encoding='utf-8', newline='')
+        counter = Counter()
+        records = transfer.export_records(options['batch_size'])
+        if options['images_dir']:
+            records = transfer.copy_images(records, options['images_dir'])
+        started = time.monotonic()
+        try:
+            WRITERS[data_format](counted(records, counter), stream)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        report = transfer.throughput(counter, time.monotonic() - started)
+        # Отчёт в stderr, чтобы не смешивать его с выгрузкой в stdout
+        self.stderr.write(report, style_func=self.style.SUCCESS)
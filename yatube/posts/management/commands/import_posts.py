@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+from posts.constants import TRANSFER_BATCH_SIZE
+
+READERS = {'jsonl': transfer.read_jsonl, 'csv': transfer.read_csv}
+
+
+class Command(BaseCommand):
+    help = ('Загружает пользователей, группы, посты, комментарии и '
+            'подписки из JSONL или CSV, выгруженных export_posts')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл выгрузки или - для stdin')
+        parser.add_argument('--format', choices=READERS,
+                            help='По умолчанию по расширению файла')
+        parser.add_argument('--batch-size', type=int,
+                            default=TRANSFER_BATCH_SIZE)
+        parser.add_argument('--images-dir',
+                            help='Каталог с картинками постов')
+        parser.add_argument(
+            '--source',
+            help='Имя выгрузки: повторная загрузка с тем же именем '
+                 'пропускает уже загруженные записи. По умолчанию имя '
+                 'файла')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        data_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl')
+        if path == '-':
+            stream = sys.stdin
+        else:
+            try:
+                stream = open(path, encoding='utf-8', newline='')
+            except OSError as error:
+                raise CommandError(error)
+        source = options['source'] or os.path.basename(path)
+        importer = transfer.Importer(
+            options['batch_size'], options['images_dir'], source)
+        started = time.monotonic()
+        try:
+            for record in READERS[data_format](stream):
+                importer.add(record)
+            importer.finish()
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        self.stdout.write(self.style.SUCCESS(transfer.throughput(
+            importer.imported, time.monotonic() - started)))
+        skipped = sum(importer.skipped.values())
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f'Пропущено записей: {skipped}'))
+        self.stdout.write('Варианты картинок: '
+                          'manage.py build_image_variants --missing')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import (recount_groups, recount_posts, recount_replies,
+                            recount_users)
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики постов, комментариев, ответов и '
+            'подписок')
+
+    def handle(self, *args, **options):
+        recount_users()
+        self.stdout.write('Счётчики пользователей пересчитаны')
+        recount_groups()
+        self.stdout.write('Счётчики групп пересчитаны')
+        recount_posts()
+        recount_replies()
+        self.stdout.write(self.style.SUCCESS(
+            'Счётчики комментариев пересчитаны'))
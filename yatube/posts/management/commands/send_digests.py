@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.constants import DIGEST_BATCH_SIZE
+from posts.notifications import send_digests
+
+
+class Command(BaseCommand):
+    help = ('Отправляет подписчикам дайджест новых постов; запускается '
+            'по расписанию, например раз в час')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=DIGEST_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        sent = send_digests(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Отправлено дайджестов: {sent}'))
@@ -0,0 +1,53 @@
+from math import ceil
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import reverse
+
+from core.tasks import shared_cache
+from posts import views
+from posts.constants import POSTS_PER_PAGE
+from posts.models import Group, Post
+
+
+class Command(BaseCommand):
+    help = ('Заранее отрисовывает первые страницы главной и групп, '
+            'чтобы их фрагменты оказались в общем кэше')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=3,
+                            help='Сколько первых страниц отрисовать')
+
+    def handle(self, *args, **options):
+        # Кэш процесса исчез бы вместе с командой
+        if not shared_cache():
+            raise CommandError(
+                'Кэш не общий: задайте CACHE_BACKEND (file, memcached, '
+                'redis), иначе прогрев останется в процессе команды')
+        targets = [(reverse('posts:index'), views.index, {},
+                    Post.objects.count())]
+        targets.extend(
+            (reverse('posts:group_list', kwargs={'slug': slug}),
+             views.group_posts, {'slug': slug}, count)
+            for slug, count in Group.objects.values_list(
+                'slug', 'posts_count')
+        )
+        # Страницы гостей, как их запросил бы браузер с адреса сайта
+        factory = RequestFactory(HTTP_HOST=urlsplit(settings.SITE_URL).netloc)
+        rendered = failed = 0
+        for url, view, kwargs, posts_count in targets:
+            pages = min(options['pages'], ceil(posts_count / POSTS_PER_PAGE))
+            for page in range(1, max(pages, 1) + 1):
+                request = factory.get(url, {'page': page})
+                request.user = AnonymousUser()
+                if view(request, **kwargs).status_code == 200:
+                    rendered += 1
+                else:
+                    failed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Отрисовано страниц: {rendered}'))
+        if failed:
+            raise CommandError(f'Страниц с ошибкой: {failed}')
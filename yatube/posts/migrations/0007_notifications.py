@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_view_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='digest_sent_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последний дайджест'),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='feed_read_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Лента подписок прочитана'),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Непрочитанных постов'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Ширина id в пути, как COMMENT_PATH_WIDTH на момент миграции
+PATH_WIDTH = 10
+
+
+def fill_paths(apps, schema_editor):
+    """До миграции все комментарии корневые: путь — их собственный id."""
+    Comment = apps.get_model('posts', 'Comment')
+    comments = []
+    for pk in Comment.objects.values_list('pk', flat=True).iterator():
+        comments.append(Comment(pk=pk, path=str(pk).zfill(PATH_WIDTH)))
+        if len(comments) >= 1000:
+            Comment.objects.bulk_update(comments, ['path'])
+            comments = []
+    Comment.objects.bulk_update(comments, ['path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_notifications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Путь в ветке'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='replies_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Ответов в ветке'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'parent', '-pub_date', '-id'], name='posts_comment_root_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='posts_comment_path_idx'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def copy_pub_date(apps, schema_editor):
+    # Для старых записей время добавления неизвестно, ближе всего дата
+    # поста: иначе все они попали бы в следующий дайджест
+    FeedEntry = apps.get_model('posts', 'FeedEntry')
+    FeedEntry.objects.update(created=F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_import_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedentry',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=timezone.now, verbose_name='Добавлена в ленту'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_pub_date, migrations.RunPython.noop),
+    ]
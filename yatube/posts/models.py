@@ -3,15 +3,31 @@ from django.db import models
 
 from core.models import CreatedModel
 
-from .constants import POST_FIRST_CHARS_STR
+from .constants import (COMMENT_PATH_MAX_LENGTH, COMMENT_PATH_WIDTH,
+                        POST_FIRST_CHARS_STR, SEARCH_TERM_MAX_LENGTH,
+                        TRANSFER_KEY_MAX_LENGTH)
 
 User = get_user_model()
 
 
+def import_key_field():
+    # Источник и id строки в файле, из которого её загрузил import_posts
+    # (posts.transfer); у строк, созданных на сайте, пусто
+    return models.CharField(
+        'Ключ загрузки',
+        max_length=TRANSFER_KEY_MAX_LENGTH,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+
 class Group(models.Model):
     title = models.CharField('Имя группы', max_length=200)
     slug = models.SlugField('slug группы', unique=True)
     description = models.TextField('Описание группы')
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
 
     def __str__(self):
         return self.title
@@ -21,6 +37,13 @@ class Group(models.Model):
         verbose_name_plural = 'Группы'
 
 
+class PostQuerySet(models.QuerySet):
+    def with_related(self):
+        """Подгружает связи, которые выводятся в карточке поста."""
+        return self.select_related('author', 'group').prefetch_related(
+            'image_variants')
+
+
 class Post(CreatedModel):
     text = models.TextField(
         'Текст поста',
@@ -46,16 +69,52 @@ class Post(CreatedModel):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0
+    )
+    import_key = import_key_field()
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:POST_FIRST_CHARS_STR]
 
     class Meta:
         ordering = ('-pub_date',)
+        # Профиль и группа выбирают посты одним диапазоном индекса
+        # в порядке вывода, без сортировки всей истории автора
+        indexes = [
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='posts_post_author_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='posts_post_group_date_idx'),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
 
+class CommentQuerySet(models.QuerySet):
+    def roots(self):
+        return self.filter(parent__isnull=True)
+
+    def descendants(self, *comments):
+        """Ответы на comments на любой глубине в порядке ветки.
+
+        Путь потомка начинается с пути предка и состоит только из цифр,
+        поэтому ветка — это диапазон индекса (post, path) при любой
+        сортировке строк в базе.
+        """
+        ranges = models.Q()
+        for comment in comments:
+            ranges |= models.Q(
+                post_id=comment.post_id, path__gt=comment.path,
+                path__lte=comment.path.ljust(COMMENT_PATH_MAX_LENGTH, '9'))
+        if not ranges:
+            return self.none()
+        return self.filter(ranges).order_by('path')
+
+
 class Comment(CreatedModel):
     post = models.ForeignKey(
         Post,
@@ -74,12 +133,65 @@ class Comment(CreatedModel):
         help_text='Добавьте комментарий'
     )
     created = models.DateTimeField('Дата комментария', auto_now_add=True)
+    parent = models.ForeignKey(
+        'self',
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='replies',
+        verbose_name='Ответ на'
+    )
+    # id предков и самого комментария, дополненные нулями до
+    # COMMENT_PATH_WIDTH цифр: сортировка по пути выводит ветку по порядку
+    path = models.CharField(
+        'Путь в ветке',
+        max_length=COMMENT_PATH_MAX_LENGTH,
+        blank=True,
+        editable=False
+    )
+    replies_count = models.PositiveIntegerField(
+        'Ответов в ветке',
+        default=0
+    )
+    import_key = import_key_field()
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['post', '-pub_date'],
+                         name='posts_comment_post_date_idx'),
+            models.Index(fields=['post', 'parent', '-pub_date', '-id'],
+                         name='posts_comment_root_date_idx'),
+            models.Index(fields=['post', 'path'],
+                         name='posts_comment_path_idx'),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
+    @staticmethod
+    def make_path(parent_path, pk):
+        return parent_path + str(pk).zfill(COMMENT_PATH_WIDTH)
+
+    @staticmethod
+    def path_ids(path):
+        """id комментариев ветки от корня до последнего в пути."""
+        return [int(path[start:start + COMMENT_PATH_WIDTH])
+                for start in range(0, len(path), COMMENT_PATH_WIDTH)]
+
+    @property
+    def depth(self):
+        return max(len(self.path) // COMMENT_PATH_WIDTH - 1, 0)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if not self.path:
+            # Путь включает id, поэтому пишется вторым запросом
+            self.path = self.make_path(
+                self.parent.path if self.parent_id else '', self.pk)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -97,3 +209,132 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ('user', 'author')
+        # Подписчики автора при рассылке поста по лентам
+        indexes = [
+            models.Index(fields=['author', 'user'],
+                         name='posts_follow_author_user_idx'),
+        ]
+
+
+class ImageVariant(models.Model):
+    """Уменьшенная копия картинки поста определённой ширины и формата."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_variants',
+        verbose_name='Пост'
+    )
+    source = models.CharField('Исходная картинка', max_length=255)
+    image = models.ImageField('Картинка', upload_to='posts/variants/')
+    format = models.CharField('Формат', max_length=10)
+    width = models.PositiveIntegerField('Ширина')
+    height = models.PositiveIntegerField('Высота')
+    size = models.PositiveIntegerField('Размер файла, байт')
+
+    class Meta:
+        ordering = ('width',)
+        unique_together = ('post', 'format', 'width')
+        verbose_name = 'Вариант картинки'
+        verbose_name_plural = 'Варианты картинок'
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, которые поддерживаются сигналами."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков',
+        default=0
+    )
+    following_count = models.PositiveIntegerField(
+        'Число подписок',
+        default=0
+    )
+    # Новые посты авторов из подписок, которые пользователь не видел
+    unread_count = models.PositiveIntegerField(
+        'Непрочитанных постов',
+        default=0
+    )
+    feed_read_at = models.DateTimeField(
+        'Лента подписок прочитана',
+        null=True,
+        blank=True
+    )
+    digest_sent_at = models.DateTimeField(
+        'Последний дайджест',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+
+class FeedEntry(models.Model):
+    """Запись ленты подписок: пост автора, на которого подписан user.
+
+    Заполняется при публикации поста и при подписке, поэтому страница
+    подписок читается одним диапазоном по индексу (user, pub_date).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+    # Воркер очереди разносит пост позже его публикации: дайджест
+    # отсекает уже отправленное по времени записи, а не поста
+    created = models.DateTimeField('Добавлена в ленту', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-pub_date', '-id')
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-id'],
+                         name='posts_feed_user_date_idx'),
+            models.Index(fields=['user', 'author'],
+                         name='posts_feed_user_author_idx'),
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+
+
+class SearchTerm(models.Model):
+    """Строка обратного индекса: основа слова и посты, где она есть.
+
+    weight складывает вхождения основы в текст поста и в комментарии
+    к нему с весами SEARCH_TEXT_WEIGHT и SEARCH_COMMENT_WEIGHT.
+    """
+    term = models.CharField('Основа слова', max_length=SEARCH_TERM_MAX_LENGTH)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name='Пост'
+    )
+    weight = models.PositiveIntegerField('Вес', default=0)
+
+    class Meta:
+        unique_together = ('term', 'post')
+        verbose_name = 'Слово поискового индекса'
+        verbose_name_plural = 'Поисковый индекс'
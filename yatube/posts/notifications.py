@@ -0,0 +1,104 @@
+"""Уведомления о новых постах авторов из подписок.
+
+Публикация поста увеличивает UserStats.unread_count всем подписчикам
+автора одним UPDATE, поэтому узнать число непрочитанных можно по
+первичному ключу, не обращаясь к ленте. Открытие ленты подписок
+обнуляет счётчик. Письма не отправляются на каждый пост: команда
+send_digests раз в период отправляет каждому подписчику одно письмо
+со всеми постами, которые он ещё не видел.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .constants import (DIGEST_BATCH_SIZE, DIGEST_LOOKBACK_HOURS,
+                        DIGEST_MAX_POSTS)
+from .models import FeedEntry, Follow, UserStats
+
+
+def notify_followers(author_id):
+    UserStats.objects.filter(user_id__in=Follow.objects.filter(
+        author_id=author_id).values('user_id')).update(
+        unread_count=F('unread_count') + 1)
+
+
+def mark_read(user_id):
+    unread = UserStats.objects.filter(user_id=user_id, unread_count__gt=0)
+    # Без непрочитанных лента не пишет в базу и не закрепляет браузер
+    # за основной базой (core.routing)
+    if unread.exists():
+        unread.update(unread_count=0, feed_read_at=timezone.now())
+
+
+def unread_count(user_id):
+    return UserStats.objects.filter(user_id=user_id).values_list(
+        'unread_count', flat=True).first() or 0
+
+
+def _digest(stats, now):
+    """Письмо с непрочитанными постами или None, если их нет."""
+    entries = FeedEntry.objects.filter(
+        user_id=stats.user_id,
+        pub_date__gt=now - timedelta(hours=DIGEST_LOOKBACK_HOURS),
+    ).select_related('post__author')
+    # Пост, опубликованный до прошлого дайджеста, но разнесённый по
+    # лентам после него, ещё не отправлен: отсечка по времени записи
+    seen = [moment for moment in (stats.feed_read_at, stats.digest_sent_at)
+            if moment]
+    if seen:
+        entries = entries.filter(created__gt=max(seen))
+    posts = [entry.post for entry in entries[:DIGEST_MAX_POSTS]]
+    if not posts:
+        return None
+    # unread_count копится до открытия ленты, а в письме нужны только
+    # посты с прошлого дайджеста
+    total = len(posts)
+    if total == DIGEST_MAX_POSTS:
+        total = entries.count()
+    context = {
+        'user': stats.user,
+        'site_url': settings.SITE_URL,
+        'posts': posts,
+        'unread_count': total,
+        'more': total - len(posts),
+    }
+    return EmailMessage(
+        subject=f'Новых постов в подписках: {total}',
+        body=render_to_string('posts/email/digest.txt', context),
+        to=[stats.user.email],
+    )
+
+
+def send_digests(batch_size=DIGEST_BATCH_SIZE):
+    """Отправляет дайджесты всем, у кого есть непрочитанные посты.
+
+    Письма пачки уходят одним вызовом почтового бэкенда. Возвращает
+    число отправленных писем.
+    """
+    now = timezone.now()
+    recipients = UserStats.objects.filter(
+        unread_count__gt=0, user__is_active=True).exclude(
+        user__email='').select_related('user').order_by('pk')
+    sent, batch = 0, []
+    for stats in recipients.iterator(chunk_size=batch_size):
+        message = _digest(stats, now)
+        if message is not None:
+            batch.append((stats.pk, message))
+        if len(batch) >= batch_size:
+            sent += _send(batch, now)
+            batch = []
+    if batch:
+        sent += _send(batch, now)
+    return sent
+
+
+def _send(batch, now):
+    get_connection().send_messages(
+        [message for _, message in batch])
+    UserStats.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+        digest_sent_at=now)
+    return len(batch)
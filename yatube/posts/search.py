@@ -0,0 +1,123 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Тексты разбиваются на слова и приводятся к основам русским стеммером,
+основы хранятся в обратном индексе SearchTerm. Индекс обновляется
+сигналами при изменении постов и комментариев: добавляются и вычитаются
+только веса изменившегося текста. Результаты ранжируются по TF-IDF.
+"""
+import math
+import re
+from collections import Counter
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import (Case, Count, ExpressionWrapper, F, FloatField,
+                              Sum, Value, When)
+
+from . import cache
+from .constants import (SEARCH_BATCH_SIZE, SEARCH_COMMENT_WEIGHT,
+                        SEARCH_TERM_MAX_LENGTH, SEARCH_TEXT_WEIGHT)
+from .models import Comment, Post, SearchTerm
+from .stemmer import stem
+from .utils import cached_count, estimated_count
+
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Основы слов текста в порядке появления, с повторами."""
+    return [stem(word)[:SEARCH_TERM_MAX_LENGTH]
+            for word in WORD_RE.findall(text.lower())]
+
+
+def add_text(post_id, text, weight, sign=1):
+    """Добавляет (или при sign=-1 вычитает) веса слов текста в индекс."""
+    counts = Counter(tokenize(text))
+    if not counts:
+        return
+    with transaction.atomic():
+        entries = SearchTerm.objects.filter(post_id=post_id)
+        if sign > 0:
+            # Новые основы вставляются с нулевым весом, уже существующие
+            # (в том числе добавленные параллельной задачей) пропускаются;
+            # вес всем основам прибавляет UPDATE ниже
+            SearchTerm.objects.bulk_create([
+                SearchTerm(term=term, post_id=post_id, weight=0)
+                for term in counts
+            ], ignore_conflicts=True)
+        # Один UPDATE на каждое встретившееся число вхождений
+        by_delta = {}
+        for term, count in counts.items():
+            by_delta.setdefault(count * weight, []).append(term)
+        for delta, terms in by_delta.items():
+            terms = entries.filter(term__in=terms)
+            if sign < 0:
+                terms.filter(weight__lte=delta).delete()
+            terms.update(weight=F('weight') + sign * delta)
+
+
+def remove_text(post_id, text, weight):
+    add_text(post_id, text, weight, sign=-1)
+
+
+def _post_entries(posts):
+    comments = {}
+    for post_id, text in Comment.objects.filter(
+            post_id__in=[post.pk for post in posts]).values_list(
+            'post_id', 'text').iterator():
+        comments.setdefault(post_id, []).append(text)
+    for post in posts:
+        counts = Counter()
+        for term in tokenize(post.text):
+            counts[term] += SEARCH_TEXT_WEIGHT
+        for text in comments.get(post.pk, ()):
+            for term in tokenize(text):
+                counts[term] += SEARCH_COMMENT_WEIGHT
+        for term, weight in counts.items():
+            yield SearchTerm(term=term, post_id=post.pk, weight=weight)
+
+
+def rebuild(posts=None):
+    """Строит индекс заново для постов (по умолчанию для всех)."""
+    if posts is None:
+        posts = Post.objects.all()
+    posts = posts.only('pk', 'text').order_by('pk').iterator()
+    indexed = 0
+    while True:
+        batch = list(islice(posts, SEARCH_BATCH_SIZE))
+        if not batch:
+            return indexed
+        with transaction.atomic():
+            SearchTerm.objects.filter(
+                post_id__in=[post.pk for post in batch]).delete()
+            SearchTerm.objects.bulk_create(
+                _post_entries(batch), batch_size=SEARCH_BATCH_SIZE)
+        indexed += len(batch)
+
+
+def search(query):
+    """Посты, содержащие все слова запроса, от наиболее релевантных."""
+    terms = set(tokenize(query))
+    if not terms:
+        return Post.objects.none()
+    frequencies = dict(
+        SearchTerm.objects.filter(term__in=terms).order_by().values(
+            'term').annotate(posts=Count('post')).values_list(
+            'term', 'posts'))
+    if len(frequencies) < len(terms):
+        return Post.objects.none()
+    # Число постов для IDF: оценка PostgreSQL или подсчёт из кэша,
+    # который сбрасывается вместе с главной страницей
+    all_posts = Post.objects.all()
+    total = estimated_count(all_posts) or cached_count(
+        all_posts, [cache.INDEX])
+    rank = Sum(Case(
+        *[When(search_terms__term=term, then=ExpressionWrapper(
+            F('search_terms__weight') * Value(math.log(1 + total / posts)),
+            output_field=FloatField()))
+          for term, posts in frequencies.items()],
+        output_field=FloatField(),
+    ))
+    return Post.objects.filter(search_terms__term__in=terms).annotate(
+        matched=Count('search_terms'), rank=rank,
+    ).filter(matched=len(terms)).order_by('-rank', '-pub_date', '-id')
@@ -0,0 +1,88 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import cache, tasks
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+        return
+    # Вход пользователя обновляет только last_login, страницы не меняются
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        cache.bump(cache.RELATED, cache.author_scope(instance.pk))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    cache.bump(cache.RELATED, cache.group_scope(instance.pk))
+
+
+@receiver(pre_save, sender=Post)
+def post_presave(sender, instance, **kwargs):
+    # Запоминаем прежние группу, текст и картинку, чтобы при
+    # редактировании перенести пост между счётчиками групп, обновить
+    # поисковый индекс и удалить варианты заменённой картинки
+    if not instance._state.adding:
+        (instance._previous_group_id, instance._previous_text,
+         instance._previous_image) = (
+            Post.objects.filter(pk=instance.pk).values_list(
+                'group_id', 'text', 'image').first() or (None, None, None))
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        tasks.post_created.delay(instance.pk, instance.author_id,
+                                 instance.group_id, instance.text)
+        return
+    tasks.post_changed.delay(
+        instance.pk, instance.author_id, instance.group_id,
+        getattr(instance, '_previous_group_id', None),
+        getattr(instance, '_previous_text', None), instance.text,
+        getattr(instance, '_previous_image', None), instance.image.name)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    tasks.post_deleted.delay(instance.pk, instance.author_id,
+                             instance.group_id)
+
+
+@receiver(pre_save, sender=Comment)
+def comment_presave(sender, instance, **kwargs):
+    if not instance._state.adding:
+        instance._previous_text = Comment.objects.filter(
+            pk=instance.pk).values_list('text', flat=True).first()
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        tasks.comment_created.delay(
+            instance.post_id, instance.text, instance.parent_id)
+        return
+    previous_text = getattr(instance, '_previous_text', None)
+    if previous_text != instance.text:
+        tasks.comment_changed.delay(
+            instance.post_id, previous_text, instance.text)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    tasks.comment_deleted.delay(
+        instance.post_id, instance.text, instance.path)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        tasks.follow_created.delay(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    tasks.follow_deleted.delay(instance.user_id, instance.author_id)
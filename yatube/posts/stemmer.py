@@ -0,0 +1,122 @@
+"""Стеммер Портера (Snowball) для русского языка.
+
+Реализация алгоритма http://snowball.tartarus.org/algorithms/russian/
+stemmer.html без внешних зависимостей.
+"""
+VOWELS = 'аеиоуыэюя'
+
+# Окончания первой группы удаляются, только если перед ними «а» или «я»
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = ((), (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+))
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = ((), (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+    'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+    'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+    'ья', 'я',
+))
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+
+def _sorted(groups):
+    # Как и в Snowball, выбирается самое длинное подходящее окончание
+    endings = [(ending, index == 0)
+               for index, group in enumerate(groups) for ending in group]
+    return sorted(endings, key=lambda item: len(item[0]), reverse=True)
+
+
+PERFECTIVE_GERUND = _sorted(PERFECTIVE_GERUND)
+ADJECTIVE = _sorted(ADJECTIVE)
+PARTICIPLE = _sorted(PARTICIPLE)
+REFLEXIVE = _sorted(REFLEXIVE)
+VERB = _sorted(VERB)
+NOUN = _sorted(NOUN)
+
+
+def _strip(word, endings):
+    """Слово без найденного окончания или None, если окончания нет."""
+    for ending, after_a in endings:
+        if not word.endswith(ending):
+            continue
+        rest = word[:-len(ending)]
+        if after_a and not rest.endswith(('а', 'я')):
+            return None
+        return rest
+    return None
+
+
+def _region(word, start):
+    # Начало области после первой согласной, следующей за гласной
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _step_1(rv):
+    rest = _strip(rv, PERFECTIVE_GERUND)
+    if rest is not None:
+        return rest
+    without_reflexive = _strip(rv, REFLEXIVE)
+    if without_reflexive is not None:
+        rv = without_reflexive
+    rest = _strip(rv, ADJECTIVE)
+    if rest is not None:
+        participle = _strip(rest, PARTICIPLE)
+        return rest if participle is None else participle
+    for endings in (VERB, NOUN):
+        rest = _strip(rv, endings)
+        if rest is not None:
+            return rest
+    return rv
+
+
+def _step_4(rv):
+    if rv.endswith('нн'):
+        return rv[:-1]
+    if rv.endswith(SUPERLATIVE):
+        rv = rv[:-4] if rv.endswith('ейше') else rv[:-3]
+        return rv[:-1] if rv.endswith('нн') else rv
+    if rv.endswith('ь'):
+        return rv[:-1]
+    return rv
+
+
+def stem(word):
+    """Основа слова: окончания и суффиксы отбрасываются по шагам 1–4."""
+    word = word.lower().replace('ё', 'е')
+    for index, letter in enumerate(word):
+        if letter in VOWELS:
+            rv_start = index + 1
+            break
+    else:
+        return word
+    r2_start = _region(word, _region(word, 0)) - rv_start
+    prefix, rv = word[:rv_start], word[rv_start:]
+    rv = _step_1(rv)
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    for ending in DERIVATIONAL:
+        if rv.endswith(ending) and len(rv) - len(ending) >= r2_start:
+            rv = rv[:-len(ending)]
+            break
+    return prefix + _step_4(rv)
@@ -0,0 +1,148 @@
+"""Ленты Atom и JSON Feed для главной, групп и авторов.
+
+Документ отдаётся потоком: заголовок ленты и каждая запись
+сериализуются по мере отправки ответа. Готовый документ сохраняется в
+кэше под ключом с поколениями областей ленты (posts.cache), поэтому
+новый пост сразу делает прежнюю копию недоступной, а опросы без
+изменений не обращаются к постам вовсе.
+"""
+import hashlib
+import json
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.feedgenerator import SimplerXMLGenerator, rfc3339_date
+
+from . import cache
+from .constants import FEED_ITEMS, POST_FIRST_CHARS_TITLE
+
+CONTENT_TYPES = {
+    'atom': 'application/atom+xml; charset=utf-8',
+    'json': 'application/feed+json; charset=utf-8',
+}
+
+
+def _entry(request, post):
+    url = request.build_absolute_uri(
+        reverse('posts:post_detail', args=(post.pk,)))
+    return {
+        'id': url,
+        'url': url,
+        'title': post.text[:POST_FIRST_CHARS_TITLE],
+        'text': post.text,
+        'date': post.pub_date,
+        'author': post.author.get_full_name() or post.author.username,
+        'group': post.group.title if post.group_id else None,
+        'image': request.build_absolute_uri(post.image.url)
+        if post.image else None,
+    }
+
+
+def _atom(meta, entries):
+    stream = StringIO()
+    xml = SimplerXMLGenerator(stream, 'utf-8')
+    xml.startDocument()
+    xml.startElement('feed', {'xmlns': 'http://www.w3.org/2005/Atom',
+                              'xml:lang': 'ru'})
+    xml.addQuickElement('title', meta['title'])
+    xml.addQuickElement('id', meta['url'])
+    xml.addQuickElement('link', '', {'href': meta['url']})
+    xml.addQuickElement('link', '', {'rel': 'self', 'href': meta['feed_url']})
+    xml.addQuickElement('updated', rfc3339_date(meta['updated']))
+    for entry in entries:
+        # Запись уходит клиенту, пока следующая ещё не сериализована
+        yield stream.getvalue()
+        stream.seek(0)
+        stream.truncate()
+        xml.startElement('entry', {})
+        xml.addQuickElement('title', entry['title'])
+        xml.addQuickElement('id', entry['id'])
+        xml.addQuickElement('link', '', {'href': entry['url']})
+        xml.addQuickElement('updated', rfc3339_date(entry['date']))
+        xml.addQuickElement('published', rfc3339_date(entry['date']))
+        xml.startElement('author', {})
+        xml.addQuickElement('name', entry['author'])
+        xml.endElement('author')
+        if entry['group']:
+            xml.addQuickElement('category', '', {'term': entry['group']})
+        if entry['image']:
+            xml.addQuickElement('link', '', {
+                'rel': 'enclosure', 'href': entry['image']})
+        xml.addQuickElement('content', entry['text'], {'type': 'text'})
+        xml.endElement('entry')
+    xml.endElement('feed')
+    yield stream.getvalue()
+
+
+def _json(meta, entries):
+    yield json.dumps({
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': meta['title'],
+        'home_page_url': meta['url'],
+        'feed_url': meta['feed_url'],
+        'language': 'ru',
+    }, ensure_ascii=False)[:-1] + ', "items": ['
+    for number, entry in enumerate(entries):
+        item = {
+            'id': entry['id'],
+            'url': entry['url'],
+            'title': entry['title'],
+            'content_text': entry['text'],
+            'date_published': entry['date'].isoformat(),
+            'authors': [{'name': entry['author']}],
+        }
+        if entry['group']:
+            item['tags'] = [entry['group']]
+        if entry['image']:
+            item['image'] = entry['image']
+        yield (', ' if number else '') + json.dumps(item, ensure_ascii=False)
+    yield ']}'
+
+
+WRITERS = {'atom': _atom, 'json': _json}
+
+
+def _cached(chunks, key):
+    # Копит отправленные части и кладёт документ в кэш целиком
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    django_cache.set(key, ''.join(parts), None)
+
+
+def _public(response):
+    # Лента одинакова для всех читателей, её может хранить прокси
+    patch_cache_control(response, public=True, max_age=0,
+                        s_maxage=settings.EDGE_CACHE_SECONDS)
+    return response
+
+
+def feed_response(request, feed_format, title, url, posts, scopes):
+    """Ответ с лентой posts; scopes — области, от которых она зависит.
+
+    url — адрес HTML-страницы, которую повторяет лента.
+    """
+    key = 'posts:feed:' + hashlib.md5(repr((
+        request.build_absolute_uri(), cache.cache_version(*scopes),
+    )).encode()).hexdigest()
+    content_type = CONTENT_TYPES[feed_format]
+    document = django_cache.get(key)
+    if document is not None:
+        return _public(HttpResponse(document, content_type=content_type))
+    posts = list(posts.with_related()[:FEED_ITEMS])
+    meta = {
+        'title': title,
+        'url': request.build_absolute_uri(url),
+        'feed_url': request.build_absolute_uri(),
+        'updated': posts[0].pub_date if posts else timezone.now(),
+    }
+    entries = (_entry(request, post) for post in posts)
+    return _public(StreamingHttpResponse(
+        _cached(WRITERS[feed_format](meta, entries), key),
+        content_type=content_type))
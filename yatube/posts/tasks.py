@@ -0,0 +1,126 @@
+"""Побочные эффекты записи постов, комментариев и подписок.
+
+Сигналы только ставят эти задачи в очередь (core.tasks). Каждая задача
+получает всё, что нужно для её изменений, в аргументах — например,
+прежний и новый текст, — поэтому результат не зависит от того, когда
+воркер до неё доберётся.
+"""
+from core.tasks import after_commit, task
+
+from . import cache, feed, images, notifications, search
+from .constants import (COMMENT_PATH_WIDTH, SEARCH_COMMENT_WEIGHT,
+                        SEARCH_TEXT_WEIGHT)
+from .counters import change
+from .models import Comment, Group, Post, UserStats
+
+
+def change_group(group_id, delta):
+    if group_id is not None:
+        change(Group.objects.filter(pk=group_id), 'posts_count', delta)
+
+
+def bump_post(post_id, author_id, group_id, previous_group_id=None):
+    after_commit(cache.bump_post, Post(
+        pk=post_id, author_id=author_id, group_id=group_id),
+        previous_group_id)
+
+
+def bump_comment_post(post_id):
+    # Комментарий меняет страницу поста, а в списках только число
+    # комментариев в карточке. Главную, общую для всех постов, он не
+    # сбрасывает: там число обновится вместе со следующим постом
+    post = Post.objects.filter(pk=post_id).only(
+        'author_id', 'group_id').first()
+    if post is None:
+        return
+    scopes = [cache.post_scope(post.pk), cache.author_scope(post.author_id)]
+    if post.group_id is not None:
+        scopes.append(cache.group_scope(post.group_id))
+    after_commit(cache.bump, *scopes)
+
+
+def change_replies(path, delta):
+    # Счётчик ответов ведут все комментарии ветки выше изменённого
+    ids = Comment.path_ids(path)
+    if ids:
+        change(Comment.objects.filter(pk__in=ids), 'replies_count', delta)
+
+
+@task
+def post_created(post_id, author_id, group_id, text):
+    change(UserStats.objects.filter(user_id=author_id), 'posts_count', 1)
+    change_group(group_id, 1)
+    bump_post(post_id, author_id, group_id)
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        feed.fan_out(post)
+        notifications.notify_followers(author_id)
+        search.add_text(post_id, text, SEARCH_TEXT_WEIGHT)
+
+
+@task
+def post_changed(post_id, author_id, group_id, previous_group_id,
+                 previous_text, text, previous_image=None, image=None):
+    if previous_group_id != group_id:
+        change_group(previous_group_id, -1)
+        change_group(group_id, 1)
+    if previous_text != text and Post.objects.filter(pk=post_id).exists():
+        search.remove_text(post_id, previous_text or '', SEARCH_TEXT_WEIGHT)
+        search.add_text(post_id, text, SEARCH_TEXT_WEIGHT)
+    if previous_image != image:
+        images.clear_stale_variants(post_id, image or '')
+    bump_post(post_id, author_id, group_id, previous_group_id)
+
+
+@task
+def post_deleted(post_id, author_id, group_id):
+    change(UserStats.objects.filter(user_id=author_id), 'posts_count', -1)
+    change_group(group_id, -1)
+    images.delete_variant_files(post_id)
+    bump_post(post_id, author_id, group_id)
+
+
+@task
+def comment_created(post_id, text, parent_id=None):
+    change(Post.objects.filter(pk=post_id), 'comments_count', 1)
+    if parent_id is not None:
+        change_replies(Comment.objects.filter(pk=parent_id).values_list(
+            'path', flat=True).first() or '', 1)
+    if Post.objects.filter(pk=post_id).exists():
+        search.add_text(post_id, text, SEARCH_COMMENT_WEIGHT)
+    bump_comment_post(post_id)
+
+
+@task
+def comment_changed(post_id, previous_text, text):
+    if Post.objects.filter(pk=post_id).exists():
+        search.remove_text(post_id, previous_text or '',
+                           SEARCH_COMMENT_WEIGHT)
+        search.add_text(post_id, text, SEARCH_COMMENT_WEIGHT)
+
+
+@task
+def comment_deleted(post_id, text, path=''):
+    change(Post.objects.filter(pk=post_id), 'comments_count', -1)
+    change_replies(path[:-COMMENT_PATH_WIDTH], -1)
+    search.remove_text(post_id, text, SEARCH_COMMENT_WEIGHT)
+    bump_comment_post(post_id)
+
+
+@task
+def follow_created(user_id, author_id):
+    change(UserStats.objects.filter(user_id=author_id), 'followers_count', 1)
+    change(UserStats.objects.filter(user_id=user_id), 'following_count', 1)
+    feed.backfill(user_id, author_id)
+    after_commit(cache.bump, cache.follow_scope(user_id),
+                 cache.follow_scope(author_id))
+
+
+@task
+def follow_deleted(user_id, author_id):
+    change(UserStats.objects.filter(user_id=author_id),
+           'followers_count', -1)
+    change(UserStats.objects.filter(user_id=user_id), 'following_count', -1)
+    feed.trim(user_id, author_id)
+    after_commit(cache.bump, cache.follow_scope(user_id),
+                 cache.follow_scope(author_id))
@@ -0,0 +1,27 @@
+from django import template
+
+from ..constants import PAGINATOR_WINDOW
+
+register = template.Library()
+
+
+@register.filter
+def page_window(page_obj):
+    """Номера страниц для навигации: соседние с текущей и крайние.
+
+    Пропуски между ними обозначены None. Последняя страница при
+    оценочном числе постов не выводится: её номер неточен.
+    """
+    paginator = page_obj.paginator
+    last = paginator.num_pages
+    numbers = set(range(max(page_obj.number - PAGINATOR_WINDOW, 1),
+                        min(page_obj.number + PAGINATOR_WINDOW, last) + 1))
+    numbers.add(1)
+    if not getattr(paginator, 'estimated', False):
+        numbers.add(last)
+    window = []
+    for number in sorted(numbers):
+        if window and number - window[-1] > 1:
+            window.append(None)
+        window.append(number)
+    return window
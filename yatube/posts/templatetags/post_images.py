@@ -0,0 +1,23 @@
+from django import template
+
+from ..images import picture_sources
+from ..thumbnails import cached_thumbnail
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/post_image.html')
+def post_image(post, size='card'):
+    """Картинка поста с srcset по готовым вариантам.
+
+    Для постов без вариантов выводится готовая миниатюра sorl, а пока
+    нет и её, заглушка.
+    """
+    if not post.image:
+        return {'has_image': False}
+    picture = picture_sources(post)
+    return {
+        'has_image': True,
+        'picture': picture,
+        'thumbnail': None if picture else cached_thumbnail(post.image, size),
+    }
@@ -0,0 +1,54 @@
+from django.test import TestCase
+
+from .. import benchmarks
+from ..models import FeedEntry, Post, UserStats
+
+
+class BenchmarksTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        benchmarks.seed(users=6, posts=40, follows=3, groups=2, comments=2)
+
+    def test_seed_keeps_derived_data_consistent(self):
+        """Стенд пересчитывает счётчики и ленты после bulk_create."""
+        self.assertEqual(Post.objects.count(), 40)
+        self.assertEqual(
+            sum(UserStats.objects.values_list('posts_count', flat=True)), 40)
+        self.assertTrue(FeedEntry.objects.exists())
+
+    def test_run_reports_every_scenario(self):
+        """Отчёт содержит замеры по каждому адресу."""
+        results = benchmarks.run(repeat=1)
+        names = [item['name'] for item in results]
+        self.assertIn('posts:index', names)
+        self.assertIn('users:login submit', names)
+        for item in results:
+            with self.subTest(name=item['name']):
+                self.assertLess(item['status'], 400)
+                self.assertGreaterEqual(item['queries'], 0)
+                self.assertGreaterEqual(item['duplicate_queries'], 0)
+                self.assertIn('median', item['time_ms'])
+
+    def test_repeats_start_from_same_state(self):
+        """Повторы меняющих данные сценариев идут тем же путём."""
+        stateful = ('posts:post_create submit', 'posts:add_comment',
+                    'posts:profile_follow', 'posts:profile_unfollow',
+                    'users:logout')
+        once, repeated = (
+            {item['name']: item['queries']
+             for item in benchmarks.run(repeat=repeat)
+             if item['name'] in stateful}
+            for repeat in (1, 3))
+        self.assertEqual(repeated, once)
+        self.assertFalse(Post.objects.filter(text=benchmarks.POST_TEXT))
+
+    def test_compare_flags_query_regressions(self):
+        """Рост числа запросов попадает в список регрессий."""
+        entry = {'name': 'posts:index', 'queries': 4,
+                 'time_ms': {'median': 10}}
+        worse = dict(entry, queries=14)
+        lines, regressions = benchmarks.compare(
+            {'results': [entry]}, {'results': [worse]})
+        self.assertEqual(regressions, ['posts:index'])
+        self.assertEqual(len(lines), 1)
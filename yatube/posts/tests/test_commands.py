@@ -0,0 +1,62 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class WarmCacheCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        for i in range(25):
+            Post.objects.create(text=f'Пост {i}', author=author, group=group)
+
+    def setUp(self):
+        # Команда прогревает только общий кэш, здесь — файловый
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        shared = self.settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': directory,
+        }})
+        shared.enable()
+        self.addCleanup(shared.disable)
+        cache.clear()
+
+    def test_warm_cache_renders_first_pages(self):
+        """После прогрева страницы отдаются без выборки постов."""
+        out = StringIO()
+        call_command('warm_cache', pages=2, stdout=out)
+        self.assertIn('Отрисовано страниц: 4', out.getvalue())
+        for url in (reverse('posts:index'),
+                    reverse('posts:group_list', kwargs={'slug': 'group'})):
+            for page in (1, 2):
+                with self.subTest(url=url, page=page):
+                    with CaptureQueriesContext(connection) as queries:
+                        self.client.get(url, {'page': page})
+                    selects = [
+                        query['sql'] for query in queries.captured_queries
+                        if 'FROM "posts_post"' in query['sql']
+                        and 'LIMIT' in query['sql']
+                    ]
+                    self.assertEqual(selects, [])
+
+    def test_process_cache_refused(self):
+        """Кэш процесса команда не прогревает."""
+        with override_settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            with self.assertRaises(CommandError):
+                call_command('warm_cache', stdout=StringIO())
@@ -0,0 +1,155 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..constants import (COMMENT_INLINE_REPLIES, COMMENT_MAX_DEPTH,
+                         COMMENTS_PER_PAGE)
+from ..counters import recount_replies
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def comment(self, text='Комментарий', parent=None):
+        return Comment.objects.create(
+            post=self.post, author=self.author, text=text, parent=parent)
+
+    def reply(self, parent, text='Ответ'):
+        return self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            {'text': text, 'parent': parent.pk})
+
+    def test_reply_builds_path_and_counters(self):
+        """Ответ продолжает путь родителя и увеличивает счётчики ветки."""
+        root = self.comment()
+        child = self.comment(parent=root)
+        response = self.reply(child)
+        self.assertRedirects(response, reverse(
+            'posts:comment_thread',
+            kwargs={'post_id': self.post.id, 'comment_id': child.id}))
+        grandchild = Comment.objects.get(parent=child)
+        self.assertTrue(grandchild.path.startswith(child.path))
+        self.assertEqual(grandchild.depth, 2)
+        self.assertEqual(Comment.path_ids(grandchild.path),
+                         [root.pk, child.pk, grandchild.pk])
+        root.refresh_from_db()
+        child.refresh_from_db()
+        self.assertEqual((root.replies_count, child.replies_count), (2, 1))
+        self.assertEqual(list(Comment.objects.descendants(root)),
+                         [child, grandchild])
+
+        child.delete()
+        root.refresh_from_db()
+        self.assertEqual(root.replies_count, 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_depth_is_limited(self):
+        """Ответ на самом глубоком уровне встаёт рядом с родителем."""
+        parent = None
+        for _ in range(COMMENT_MAX_DEPTH):
+            parent = self.comment(parent=parent)
+        self.reply(parent)
+        reply = Comment.objects.latest('pk')
+        self.assertEqual(reply.parent_id, parent.parent_id)
+        self.assertEqual(reply.depth, COMMENT_MAX_DEPTH - 1)
+
+    def test_reply_to_other_post_ignored(self):
+        """Родитель из другого поста не принимается."""
+        other = Comment.objects.create(
+            post=Post.objects.create(text='Другой', author=self.author),
+            author=self.author, text='Чужой')
+        self.reply(other)
+        self.assertIsNone(Comment.objects.get(post=self.post).parent)
+
+    def test_post_detail_paginates_roots(self):
+        """Страница поста выводит корни курсором и небольшие ветки."""
+        roots = [self.comment(f'Корень {number}')
+                 for number in range(COMMENTS_PER_PAGE + 1)]
+        small = self.comment('Маленькая ветка', parent=roots[-1])
+        for _ in range(COMMENT_INLINE_REPLIES + 1):
+            self.comment('Большая ветка', parent=roots[-2])
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        response = self.client.get(url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertEqual(comments[0], roots[-1])
+        self.assertEqual(comments[0].thread, [small])
+        self.assertEqual(comments[1].thread, [])
+        self.assertContains(
+            response, f'ответов: {COMMENT_INLINE_REPLIES + 1}')
+        self.assertNotContains(response, 'Большая ветка')
+
+        response = self.client.get(url, {'cursor': comments.next_cursor})
+        self.assertEqual(list(response.context['comments']), [roots[0]])
+
+    def test_thread_pages(self):
+        """Страница ветки листает ответы по пути."""
+        root = self.comment()
+        replies = [self.comment(f'Ответ {number}', parent=root)
+                   for number in range(COMMENTS_PER_PAGE + 1)]
+        url = reverse('posts:comment_thread', kwargs={
+            'post_id': self.post.id, 'comment_id': root.id})
+        response = self.client.get(url)
+        self.assertEqual(response.context['replies'],
+                         replies[:COMMENTS_PER_PAGE])
+        response = self.client.get(
+            url, {'after': response.context['next_after']})
+        self.assertEqual(response.context['replies'], replies[-1:])
+        self.assertIsNone(response.context['next_after'])
+        response = self.client.get(reverse(
+            'posts:comment_thread',
+            kwargs={'post_id': self.post.id + 1, 'comment_id': root.id}))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(ESI_ENABLED=True)
+    def test_fragments(self):
+        """С ESI комментарии и ответы приходят фрагментами страниц."""
+        roots = [self.comment(f'Корень {number}')
+                 for number in range(COMMENTS_PER_PAGE + 1)]
+        self.comment('Ответ', parent=roots[-1])
+        post_url = reverse('posts:post_detail',
+                           kwargs={'post_id': self.post.id})
+        fragment_url = reverse('posts:comments_fragment',
+                               kwargs={'post_id': self.post.id})
+        response = self.client.get(post_url)
+        self.assertContains(response, f'<esi:include src="{fragment_url}"')
+        self.assertNotContains(response, 'Корень')
+
+        response = self.client.get(fragment_url)
+        self.assertContains(response, 'Корень')
+        self.assertContains(response, 'Ответ')
+        self.assertNotContains(response, '<html')
+        self.assertIn('public', response['Cache-Control'])
+        # Следующая страница открывается на странице поста
+        self.assertContains(response, f'href="{post_url}?cursor=')
+
+        thread_url = reverse('posts:comment_thread', kwargs={
+            'post_id': self.post.id, 'comment_id': roots[-1].id})
+        replies_url = reverse('posts:replies_fragment',
+                              kwargs={'comment_id': roots[-1].id})
+        self.assertContains(self.client.get(thread_url),
+                            f'<esi:include src="{replies_url}"')
+        response = self.client.get(replies_url)
+        self.assertContains(response, 'Ответ')
+        self.assertNotContains(response, 'Корень')
+
+    def test_recount_replies(self):
+        """Пересчёт восстанавливает число ответов в ветках."""
+        root = self.comment()
+        self.comment(parent=self.comment(parent=root))
+        Comment.objects.update(replies_count=0)
+        recount_replies()
+        self.assertEqual(
+            list(Comment.objects.order_by('pk').values_list(
+                'replies_count', flat=True)), [2, 1, 0])
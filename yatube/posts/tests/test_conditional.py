@@ -0,0 +1,146 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+
+    def test_not_modified_without_rendering(self):
+        """Повторный запрос с ETag получает 304 без отрисовки страницы."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest.get(url)['ETag']
+                with self.assertNumQueries(1 if url != self.urls[0] else 0):
+                    response = self.guest.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_changes_invalidate_etag(self):
+        """Новый комментарий и новый пост меняют ETag страниц."""
+        etags = {url: self.guest.get(url)['ETag'] for url in self.urls}
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий')
+        Post.objects.create(text='Новый', author=self.author)
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user_and_follow(self):
+        """ETag различается для пользователей и меняется при подписке."""
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        guest_etag = self.guest.get(url)['ETag']
+        etag = self.reader_client.get(url)['ETag']
+        self.assertNotEqual(guest_etag, etag)
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['following'])
+
+    def test_last_modified_for_guests(self):
+        """Гости получают Last-Modified, вошедшие только ETag."""
+        url = reverse('posts:index')
+        response = self.guest.get(url)
+        self.assertEqual(response.status_code, 200)
+        response = self.guest.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        response = self.guest.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date(0))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            self.reader_client.get(url).has_header('Last-Modified'))
+
+    def test_missing_objects_are_404(self):
+        """Для несуществующих объектов валидаторы не мешают ответу 404."""
+        response = self.guest.get(
+            reverse('posts:group_list', kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
+
+
+class EdgeCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id})
+
+    def test_guest_pages_are_public(self):
+        """Страницы гостей кэшируются прокси, страницы вошедших нет."""
+        response = self.guest.get(self.detail_url)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage=60', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+        response = self.author_client.get(self.detail_url)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertContains(response, 'редактировать запись')
+
+    @override_settings(ESI_ENABLED=True)
+    def test_esi_pages_are_shared(self):
+        """С ESI страница общая для всех, а формы приходят фрагментами."""
+        response = self.author_client.get(self.detail_url)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertFalse(response.has_header('Vary'))
+        self.assertNotContains(response, 'редактировать запись')
+        self.assertNotContains(response, 'csrfmiddlewaretoken')
+        fragments = (
+            reverse('core:header_fragment'),
+            reverse('posts:post_actions_fragment',
+                    kwargs={'post_id': self.post.id}),
+        )
+        for url in fragments:
+            self.assertContains(response, f'<esi:include src="{url}')
+        response = self.author_client.get(fragments[1])
+        self.assertContains(response, 'редактировать запись')
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertIn('no-store', response['Cache-Control'])
+
+    @override_settings(ESI_ENABLED=True)
+    def test_fragments(self):
+        """Фрагменты шапки и подписки выводят данные пользователя."""
+        reader = Client()
+        reader.force_login(User.objects.create_user(username='reader'))
+        response = reader.get(reverse('core:header_fragment'),
+                              {'view': 'posts:post_create'})
+        self.assertContains(response, 'Пользователь: reader')
+        response = reader.get(
+            reverse('posts:follow_fragment', kwargs={'username': 'author'}))
+        self.assertContains(response, 'Подписаться')
+        Follow.objects.create(user=User.objects.get(username='reader'),
+                              author=self.author)
+        response = reader.get(
+            reverse('posts:follow_fragment', kwargs={'username': 'author'}))
+        self.assertContains(response, 'Отписаться')
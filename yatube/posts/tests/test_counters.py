@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.first_group = Group.objects.create(
+            title='Группа_1', slug='group_1', description='Описание_1')
+        self.second_group = Group.objects.create(
+            title='Группа_2', slug='group_2', description='Описание_2')
+        self.post = Post.objects.create(
+            text='Пост', author=self.author, group=self.first_group)
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def assertCounters(self, posts, first_group, second_group, comments):
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, posts)
+        self.first_group.refresh_from_db()
+        self.second_group.refresh_from_db()
+        self.assertEqual(self.first_group.posts_count, first_group)
+        self.assertEqual(self.second_group.posts_count, second_group)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, comments)
+
+    def test_post_and_comment_counters(self):
+        """Счётчики меняются при создании, правке и удалении."""
+        self.assertCounters(1, 1, 0, 0)
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': 'Пост', 'group': self.second_group.id})
+        self.assertCounters(1, 0, 1, 0)
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            data={'text': 'Комментарий'})
+        self.assertCounters(1, 0, 1, 1)
+        Comment.objects.all().delete()
+        self.assertCounters(1, 0, 1, 0)
+        Post.objects.create(text='Второй пост', author=self.author)
+        self.assertCounters(2, 0, 1, 0)
+        Post.objects.filter(group=self.second_group).delete()
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 1)
+        self.second_group.refresh_from_db()
+        self.assertEqual(self.second_group.posts_count, 0)
+
+    def test_follow_counters(self):
+        """Счётчики подписок меняются при подписке и отписке."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).followers_count, 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.reader).following_count, 1)
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).followers_count, 0)
+
+    def test_recount_command(self):
+        """Команда recount_counters исправляет расхождения."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Comment.objects.create(post=self.post, author=self.reader, text='К')
+        UserStats.objects.all().delete()
+        Group.objects.update(posts_count=7)
+        Post.objects.update(comments_count=0)
+        call_command('recount_counters', stdout=StringIO())
+        stats = UserStats.objects.get(user=self.author)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.reader).following_count, 1)
+        self.assertCounters(1, 1, 0, 1)
+
+    def test_post_detail_does_not_count_posts(self):
+        """post_detail берёт число постов автора из счётчика."""
+        UserStats.objects.filter(user=self.author).update(posts_count=42)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}))
+        self.assertEqual(response.context['author_posts_count'], 42)
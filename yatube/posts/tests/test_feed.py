@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import FeedEntry, Follow, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.follower = User.objects.create_user(username='follower')
+        cls.author = User.objects.create_user(username='author')
+        cls.other_author = User.objects.create_user(username='other_author')
+        for i in range(3):
+            Post.objects.create(text=f'Пост автора {i}', author=cls.author)
+        Post.objects.create(text='Чужой пост', author=cls.other_author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.follower)
+
+    def feed_post_ids(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return [post.id for post in response.context['page_obj']]
+
+    def test_follow_backfills_feed(self):
+        """Подписка переносит в ленту уже опубликованные посты автора."""
+        self.client.get(reverse('posts:profile_follow',
+                                kwargs={'username': 'author'}))
+        expected = list(Post.objects.filter(
+            author=self.author).values_list('id', flat=True))
+        self.assertEqual(self.feed_post_ids(), expected)
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в ленты подписчиков, но не остальных."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        post = Post.objects.create(text='Свежий пост', author=self.author)
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.follower, post=post).exists())
+        self.assertFalse(FeedEntry.objects.filter(
+            user=self.other_author, post=post).exists())
+        self.assertEqual(self.feed_post_ids()[0], post.id)
+
+    def test_unfollow_trims_feed(self):
+        """Отписка убирает посты автора из ленты."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        Follow.objects.create(user=self.follower, author=self.other_author)
+        self.client.get(reverse('posts:profile_unfollow',
+                                kwargs={'username': 'author'}))
+        self.assertFalse(FeedEntry.objects.filter(
+            user=self.follower, author=self.author).exists())
+        self.assertEqual(len(self.feed_post_ids()), 1)
+
+    def test_deleted_post_leaves_feed(self):
+        """Удалённый пост исчезает из ленты."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        Post.objects.filter(author=self.author).first().delete()
+        self.assertEqual(len(self.feed_post_ids()), 2)
@@ -0,0 +1,100 @@
+import json
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+def content(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            text='Пост в группе', author=cls.author, group=cls.group)
+        Post.objects.create(text='Пост без группы', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_atom(self):
+        """Atom-лента группы содержит её посты."""
+        response = self.client.get(reverse(
+            'posts:group_feed', kwargs={'slug': 'group',
+                                        'feed_format': 'atom'}))
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith(
+            'application/atom+xml'))
+        feed = ElementTree.fromstring(content(response))
+        entries = feed.findall(f'{ATOM}entry')
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].find(f'{ATOM}content').text,
+                         'Пост в группе')
+        self.assertEqual(entries[0].find(f'{ATOM}author/{ATOM}name').text,
+                         'Лев Толстой')
+        self.assertTrue(entries[0].find(f'{ATOM}id').text.endswith(
+            reverse('posts:post_detail', args=(self.post.pk,))))
+
+    def test_json(self):
+        """JSON Feed автора содержит все его посты, новые первыми."""
+        response = self.client.get(reverse(
+            'posts:author_feed', kwargs={'username': 'author',
+                                         'feed_format': 'json'}))
+        feed = json.loads(content(response))
+        self.assertEqual(feed['version'], 'https://jsonfeed.org/version/1.1')
+        self.assertEqual(
+            [item['content_text'] for item in feed['items']],
+            ['Пост без группы', 'Пост в группе'])
+        self.assertEqual(feed['items'][1]['tags'], ['Группа'])
+
+    def test_cached_and_conditional(self):
+        """Повторные опросы не читают посты, новый пост обновляет ленту."""
+        url = reverse('posts:index_feed', kwargs={'feed_format': 'atom'})
+        response = self.client.get(url)
+        first = content(response)
+        self.assertIn('public', response['Cache-Control'])
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+            self.assertEqual(content(response), first)
+            self.assertEqual(self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        Post.objects.create(text='Новый пост', author=self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Новый пост', content(response).decode())
+
+    def test_not_found(self):
+        """Неизвестные формат, группа и автор дают 404."""
+        urls = (
+            reverse('posts:index_feed', kwargs={'feed_format': 'rss'}),
+            reverse('posts:group_feed', kwargs={'slug': 'missing',
+                                                'feed_format': 'atom'}),
+            reverse('posts:author_feed', kwargs={'username': 'missing',
+                                                 'feed_format': 'json'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_pages_link_feeds(self):
+        """Страницы ссылаются на свои ленты."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, reverse(
+            'posts:index_feed', kwargs={'feed_format': 'atom'}))
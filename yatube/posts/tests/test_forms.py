@@ -2,6 +2,8 @@ import shutil
 import tempfile
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import F
+from django.db.models.signals import pre_save
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
@@ -110,6 +112,21 @@ class TaskCreateFormTests(TestCase):
             ).exists()
         )
 
+    def test_post_edit_keeps_counters(self):
+        """Правка поста не затирает счётчик, изменённый во время запроса"""
+        def comment_meanwhile(sender, instance, **kwargs):
+            Post.objects.filter(pk=instance.pk).update(
+                comments_count=F('comments_count') + 1)
+
+        pre_save.connect(comment_meanwhile, sender=Post)
+        self.addCleanup(pre_save.disconnect, comment_meanwhile, sender=Post)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Изменённый', 'group': self.group.pk})
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.text, 'Изменённый')
+        self.assertEqual(post.comments_count, 1)
+
     def test_comment_post_form_not_authorised(self):
         """Валидная форма не дает добавить комментарий без авторизации"""
         comment_count = Comment.objects.count()
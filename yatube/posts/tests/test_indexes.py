@@ -0,0 +1,96 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+# Таблицы, из которых страницы выбирают списки в порядке вывода;
+# остальные запросы читают по первичному ключу или несколько строк
+LIST_TABLES = ('posts_post', 'posts_comment', 'posts_feedentry')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Планы запросов SQLite')
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(15):
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group)
+        cls.post = Post.objects.first()
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def query_plans(self, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, data)
+        plans = {}
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                if not query['sql'].startswith('SELECT') or not any(
+                        f'FROM "{table}"' in query['sql']
+                        for table in LIST_TABLES):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plans[query['sql']] = ' / '.join(
+                    row[-1] for row in cursor.fetchall())
+        return plans
+
+    def test_views_read_posts_in_index_order(self):
+        """Списки постов читаются по индексу, без сортировки в temp B-tree."""
+        url_indexes = {
+            reverse('posts:index'): 'posts_post_pub_date',
+            reverse('posts:group_list', kwargs={'slug': 'group'}):
+                'posts_post_group_date_idx',
+            reverse('posts:profile', kwargs={'username': 'author'}):
+                'posts_post_author_date_idx',
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}):
+                'posts_comment_root_date_idx',
+            reverse('posts:follow_index'): 'posts_feed_user_date_idx',
+        }
+        for url, index in url_indexes.items():
+            for data in ({'page': 2}, {'cursor': ''}):
+                with self.subTest(url=url, data=data):
+                    plans = self.query_plans(url, data)
+                    self.assertTrue(any(
+                        index in plan for plan in plans.values()))
+                    for sql, plan in plans.items():
+                        self.assertNotIn('TEMP B-TREE', plan, sql)
+
+    def test_fan_out_uses_covering_index(self):
+        """Подписчики автора выбираются только из индекса."""
+        with CaptureQueriesContext(connection) as queries:
+            Post.objects.create(text='Новый пост', author=self.author)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                if 'FROM "posts_follow"' in query['sql']:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                    plans.extend(row[-1] for row in cursor.fetchall())
+        self.assertIn(
+            'COVERING INDEX posts_follow_author_user_idx', ' '.join(plans))
+
+    def test_subtree_uses_path_index(self):
+        """Ветка комментариев выбирается диапазоном индекса по пути."""
+        root = Comment.objects.first()
+        sql, params = Comment.objects.descendants(root).query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' / '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('posts_comment_path_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
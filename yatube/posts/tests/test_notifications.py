@@ -0,0 +1,96 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import FeedEntry, Follow, Post, UserStats
+from ..notifications import send_digests
+
+User = get_user_model()
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(
+            username='follower', email='follower@example.com')
+        cls.other = User.objects.create_user(
+            username='other', email='other@example.com')
+        Follow.objects.create(user=cls.follower, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.follower)
+
+    def unread(self, user):
+        return UserStats.objects.get(user=user).unread_count
+
+    def test_new_post_increments_unread(self):
+        """Пост автора увеличивает счётчик только его подписчикам."""
+        for number in range(2):
+            Post.objects.create(text=f'Пост {number}', author=self.author)
+        self.assertEqual(self.unread(self.follower), 2)
+        self.assertEqual(self.unread(self.other), 0)
+
+    def test_follow_page_marks_read(self):
+        """Открытие ленты подписок обнуляет счётчик."""
+        Post.objects.create(text='Пост', author=self.author)
+        self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(self.unread(self.follower), 0)
+        self.assertIsNotNone(
+            UserStats.objects.get(user=self.follower).feed_read_at)
+
+    def test_digest_batches_posts(self):
+        """Несколько постов уходят одним письмом и только один раз."""
+        for number in range(3):
+            Post.objects.create(text=f'Пост {number}', author=self.author)
+        self.assertEqual(send_digests(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['follower@example.com'])
+        for number in range(3):
+            self.assertIn(f'Пост {number}', mail.outbox[0].body)
+        self.assertEqual(send_digests(), 0)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_next_digest_counts_only_new_posts(self):
+        """Следующий дайджест считает только посты после предыдущего."""
+        for number in range(2):
+            Post.objects.create(text=f'Пост {number}', author=self.author)
+        send_digests()
+        Post.objects.create(text='Новый', author=self.author)
+        self.assertEqual(send_digests(), 1)
+        self.assertEqual(mail.outbox[1].subject,
+                         'Новых постов в подписках: 1')
+        self.assertNotIn('Пост 0', mail.outbox[1].body)
+        self.assertNotIn('И ещё постов', mail.outbox[1].body)
+
+    def test_late_fan_out_in_next_digest(self):
+        """Пост, разнесённый после дайджеста, попадает в следующий."""
+        Post.objects.create(text='Первый', author=self.author)
+        send_digests()
+        sent_at = UserStats.objects.get(user=self.follower).digest_sent_at
+        # Опубликован до рассылки, в ленту записан воркером после неё
+        late = Post.objects.create(text='Запоздалый', author=self.author)
+        published = sent_at - timedelta(minutes=1)
+        Post.objects.filter(pk=late.pk).update(pub_date=published)
+        FeedEntry.objects.filter(post=late).update(pub_date=published)
+        self.assertEqual(send_digests(), 1)
+        self.assertIn('Запоздалый', mail.outbox[1].body)
+        self.assertNotIn('Первый', mail.outbox[1].body)
+
+    def test_read_posts_not_in_digest(self):
+        """Посты, прочитанные в ленте, в дайджест не попадают."""
+        Post.objects.create(text='Прочитанный', author=self.author)
+        self.client.get(reverse('posts:follow_index'))
+        Post.objects.create(text='Новый', author=self.author)
+        call_command('send_digests', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Новый', mail.outbox[0].body)
+        self.assertNotIn('Прочитанный', mail.outbox[0].body)
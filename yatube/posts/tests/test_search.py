@@ -0,0 +1,103 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post, SearchTerm
+from ..search import add_text, search
+from ..stemmer import stem
+
+User = get_user_model()
+
+
+class StemmerTests(TestCase):
+    def test_russian_stems(self):
+        """Формы одного слова приводятся к общей основе."""
+        words = {
+            'кошка': 'кошк',
+            'кошками': 'кошк',
+            'красивые': 'красив',
+            'возможностей': 'возможн',
+            'важнейшие': 'важн',
+            'улыбнувшись': 'улыбнувш',
+            'ёлки': 'елк',
+        }
+        for word, expected in words.items():
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.client = Client()
+        self.cats = Post.objects.create(
+            text='Кошки гуляли по крыше', author=self.author)
+        self.dog = Post.objects.create(
+            text='Собака спит, а кошка смотрит', author=self.author)
+        Post.objects.create(text='Про погоду', author=self.author)
+
+    def test_search_ranks_by_weight(self):
+        """Находятся все формы слова, чаще упомянутые посты выше."""
+        Comment.objects.create(
+            post=self.dog, author=self.author, text='Какая кошка!')
+        self.assertEqual(list(search('кошкой')), [self.dog, self.cats])
+
+    def test_all_words_required(self):
+        """Пост должен содержать все слова запроса."""
+        self.assertEqual(list(search('собаки кошки')), [self.dog])
+        self.assertFalse(search('кошки жираф').exists())
+        self.assertFalse(search('   ').exists())
+
+    def test_index_follows_edit_and_delete(self):
+        """Индекс обновляется при правке текста и удалении."""
+        comment = Comment.objects.create(
+            post=self.cats, author=self.author, text='Жираф')
+        self.assertEqual(list(search('жираф')), [self.cats])
+        comment.delete()
+        self.assertFalse(search('жираф').exists())
+        self.cats.text = 'Тигры гуляли'
+        self.cats.save()
+        self.assertEqual(list(search('тигр')), [self.cats])
+        self.assertEqual(list(search('кошка')), [self.dog])
+        self.dog.delete()
+        self.assertFalse(SearchTerm.objects.filter(post_id=self.dog.pk))
+
+    def test_total_count_cached(self):
+        """Число постов для ранжирования не считается на каждый запрос."""
+        search('кошка')
+        # Остаётся только подсчёт частот слов
+        with self.assertNumQueries(1):
+            search('кошка')
+        Post.objects.create(text='Ещё кошка', author=self.author)
+        with self.assertNumQueries(2):
+            search('кошка')
+
+    def test_add_text_to_existing_terms(self):
+        """Вес уже проиндексированной основы растёт, строка одна."""
+        add_text(self.cats.pk, 'Кошка и мышка, кошка', 1)
+        weights = dict(SearchTerm.objects.filter(
+            post=self.cats).values_list('term', 'weight'))
+        self.assertEqual(weights['кошк'], 4)
+        self.assertEqual(weights['мышк'], 1)
+
+    def test_rebuild_command(self):
+        """Команда строит индекс заново с теми же весами."""
+        Comment.objects.create(
+            post=self.dog, author=self.author, text='Кошка')
+        before = set(SearchTerm.objects.values_list(
+            'term', 'post_id', 'weight'))
+        SearchTerm.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(set(SearchTerm.objects.values_list(
+            'term', 'post_id', 'weight')), before)
+
+    def test_search_page(self):
+        """Страница поиска выводит найденные посты и запрос."""
+        response = self.client.get(reverse('posts:search'), {'q': 'Кошки'})
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertEqual(response.context['query'], 'Кошки')
+        response = self.client.get(reverse('posts:search'), {'q': 'жираф'})
+        self.assertContains(response, 'ничего не найдено')
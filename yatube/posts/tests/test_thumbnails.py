@@ -0,0 +1,128 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import images, thumbnails
+from ..constants import POST_IMAGE_SIZES
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=self.author,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+        self.url = reverse('posts:post_detail',
+                           kwargs={'post_id': self.post.id})
+
+    def test_placeholder_until_thumbnail_ready(self):
+        """Пока миниатюры нет, страница выводит заглушку."""
+        response = self.client.get(self.url)
+        self.assertContains(response, 'aspect-ratio: 960 / 339')
+        self.assertNotContains(response, '/media/cache/')
+
+    def test_generated_variants_are_rendered(self):
+        """После фоновой обработки страница выводит srcset вариантов."""
+        thumbnails.generate(self.post.id)
+        variants = self.post.image_variants.all()
+        self.assertEqual(
+            {variant.format for variant in variants},
+            set(images.supported_formats()))
+        jpeg = variants.get(format='JPEG')
+        self.assertEqual((jpeg.width, jpeg.height), (480, 170))
+        self.assertEqual(jpeg.source, self.post.image.name)
+        self.assertEqual(jpeg.size, jpeg.image.size)
+        response = self.client.get(self.url)
+        self.assertContains(response, f'{jpeg.image.url} 480w')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertNotContains(response, 'aspect-ratio: 960 / 339')
+
+    def test_stale_variants_fall_back_to_placeholder(self):
+        """Варианты прежней картинки не выводятся для новой."""
+        thumbnails.generate(self.post.id)
+        self.post.image = SimpleUploadedFile(
+            'other.gif', SMALL_GIF, 'image/gif')
+        self.post.save()
+        response = self.client.get(self.url)
+        self.assertNotContains(response, 'srcset=')
+        self.assertContains(response, 'aspect-ratio: 960 / 339')
+
+    def test_sorl_thumbnail_used_without_variants(self):
+        """Для постов без вариантов выводится готовая миниатюра sorl."""
+        geometry, options = POST_IMAGE_SIZES['card']
+        thumbnails.backend.get_thumbnail(self.post.image, geometry, **options)
+        response = self.client.get(self.url)
+        self.assertContains(response, '/media/cache/')
+
+    def test_build_image_variants_command(self):
+        """Команда создаёт варианты для постов, где их ещё нет."""
+        out = StringIO()
+        call_command('build_image_variants', '--missing', stdout=out)
+        self.assertTrue(self.post.image_variants.exists())
+        self.assertIn('1', out.getvalue())
+
+    def test_create_and_edit_enqueue_thumbnails(self):
+        """Создание поста и замена картинки ставят миниатюры в очередь."""
+        with mock.patch.object(thumbnails, 'enqueue') as enqueue:
+            self.client.post(reverse('posts:post_create'), data={
+                'text': 'Новый пост',
+                'image': SimpleUploadedFile(
+                    'new.gif', SMALL_GIF, 'image/gif'),
+            })
+            self.client.post(
+                reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+                data={'text': 'Без новой картинки'})
+        self.assertEqual(enqueue.call_count, 1)
+
+    def test_replaced_image_variant_files_deleted(self):
+        """Замена картинки удаляет файлы вариантов прежней картинки."""
+        thumbnails.generate(self.post.id)
+        names = [variant.image.name
+                 for variant in self.post.image_variants.all()]
+        self.post.image = SimpleUploadedFile(
+            'other.gif', SMALL_GIF, 'image/gif')
+        self.post.save()
+        self.assertFalse(self.post.image_variants.exists())
+        for name in names:
+            self.assertFalse(default_storage.exists(name))
+
+    def test_deleted_post_variant_files_deleted(self):
+        """Удаление поста удаляет файлы его вариантов."""
+        thumbnails.generate(self.post.id)
+        names = [variant.image.name
+                 for variant in self.post.image_variants.all()]
+        self.assertTrue(names)
+        self.post.delete()
+        for name in names:
+            self.assertFalse(default_storage.exists(name))
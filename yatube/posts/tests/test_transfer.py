@@ -0,0 +1,145 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import transfer
+from ..models import Comment, FeedEntry, Follow, Group, Post
+from ..search import search
+
+User = get_user_model()
+
+PUB_DATE = datetime(2020, 5, 1, 12, 30, tzinfo=timezone.utc)
+
+
+class TransferTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        author = User.objects.create_user(
+            username='author', password='secret')
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        self.post = Post.objects.create(
+            text='Кошки гуляли по крыше', author=author, group=group)
+        Post.objects.filter(pk=self.post.pk).update(pub_date=PUB_DATE)
+        Comment.objects.create(post=self.post, author=reader, text='Мяу')
+        Follow.objects.create(user=reader, author=author)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def round_trip(self, name):
+        path = os.path.join(self.directory, name)
+        call_command('export_posts', path, stderr=StringIO())
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        out = StringIO()
+        call_command('import_posts', path, batch_size=2, stdout=out)
+        return out.getvalue()
+
+    def test_round_trip(self):
+        """Выгрузка и загрузка в обоих форматах восстанавливают данные."""
+        for name in ('dump.jsonl', 'dump.csv'):
+            with self.subTest(name=name):
+                report = self.round_trip(name)
+                self.assertIn('Всего: 6', report)
+                post = Post.objects.select_related(
+                    'author__stats', 'group').get()
+                self.assertEqual(post.text, self.post.text)
+                self.assertEqual(post.pub_date, PUB_DATE)
+                self.assertEqual(post.group.slug, 'group')
+                self.assertEqual(post.comments_count, 1)
+                self.assertEqual(post.author.stats.followers_count, 1)
+                self.assertTrue(post.author.check_password('secret'))
+                self.assertTrue(Follow.objects.filter(
+                    user__username='reader', author=post.author).exists())
+
+    def test_comment_threads_restored(self):
+        """Ответы сохраняют ветку, путь и счётчики."""
+        root = Comment.objects.get()
+        Comment.objects.create(post=self.post, author=root.author,
+                               parent=root, text='Мур')
+        for name in ('dump.jsonl', 'dump.csv'):
+            with self.subTest(name=name):
+                self.round_trip(name)
+                root, reply = Comment.objects.order_by('pk')
+                self.assertEqual(reply.parent_id, root.pk)
+                self.assertEqual(reply.path,
+                                 Comment.make_path(root.path, reply.pk))
+                self.assertEqual(root.replies_count, 1)
+
+    def test_reply_to_other_post_becomes_root(self):
+        """Родитель из другого поста не принимается."""
+        path = os.path.join(self.directory, 'dump.jsonl')
+        root = Comment.objects.get()
+        with open(path, 'w') as dump:
+            transfer.write_jsonl([
+                *transfer.export_records(),
+                {'type': 'post', 'id': 100, 'author': 'author',
+                 'text': 'Другой пост',
+                 'pub_date': (PUB_DATE + timedelta(hours=1)).isoformat()},
+                {'type': 'comment', 'id': 200, 'post': 100,
+                 'author': 'reader', 'parent': root.pk, 'text': 'Чужой',
+                 'pub_date': PUB_DATE.isoformat()},
+            ], dump)
+        User.objects.all().delete()
+        call_command('import_posts', path, stdout=StringIO())
+        reply = Comment.objects.get(text='Чужой')
+        self.assertIsNone(reply.parent_id)
+        self.assertEqual(reply.path, Comment.make_path('', reply.pk))
+
+    def test_derived_data_rebuilt(self):
+        """После загрузки ленты и поисковый индекс заполнены."""
+        self.round_trip('dump.jsonl')
+        post = Post.objects.get()
+        self.assertEqual(list(search('кошка')), [post])
+        self.assertEqual(list(search('мяу')), [post])
+        self.assertTrue(FeedEntry.objects.filter(
+            user__username='reader', post=post).exists())
+
+    def test_import_into_non_empty_database(self):
+        """id из файла не совпадают с чужими строками базы."""
+        path = os.path.join(self.directory, 'dump.jsonl')
+        call_command('export_posts', path, stderr=StringIO())
+        Post.objects.filter(pk=self.post.pk).delete()
+        local = User.objects.create_user(username='local')
+        # Чужой пост занимает id поста из файла
+        Post.objects.create(id=self.post.pk, text='Местный', author=local)
+        # Счётчики строк, которых загрузка не касалась, не пересчитываются
+        Post.objects.filter(pk=self.post.pk).update(comments_count=5)
+        call_command('import_posts', path, stdout=StringIO())
+        imported = Post.objects.get(text=self.post.text)
+        self.assertNotEqual(imported.pk, self.post.pk)
+        self.assertEqual(imported.comments.get().text, 'Мяу')
+        self.assertFalse(Comment.objects.filter(post_id=self.post.pk))
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).comments_count, 5)
+
+    def test_repeated_import_skips_existing(self):
+        """Повторная загрузка того же источника не создаёт дубликатов."""
+        self.round_trip('dump.jsonl')
+        out = StringIO()
+        call_command('import_posts', os.path.join(
+            self.directory, 'dump.jsonl'), stdout=out)
+        self.assertIn('Пропущено записей: 6', out.getvalue())
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_same_author_and_date_kept_apart(self):
+        """Посты автора с одной датой остаются разными постами."""
+        twin = Post.objects.create(text='Близнец', author=self.post.author)
+        Post.objects.filter(pk=twin.pk).update(pub_date=PUB_DATE)
+        Comment.objects.create(post=twin, author=self.post.author,
+                               text='К близнецу')
+        self.round_trip('dump.jsonl')
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(
+            Comment.objects.get(text='К близнецу').post.text, 'Близнец')
+        self.assertEqual(Comment.objects.get(text='Мяу').post.text,
+                         self.post.text)
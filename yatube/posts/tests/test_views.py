@@ -1,14 +1,21 @@
 import shutil
 import tempfile
+from unittest import mock
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django import forms
 from django.core.files.uploadedfile import SimpleUploadedFile
 
+from django.core.paginator import Paginator
+from django.db import connection
 from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Group, Post, Follow
+from .. import cache as generations
+from ..models import Comment, Group, Post, Follow, UserStats
+from ..templatetags.pagination import page_window
 from django.core.cache import cache
 
 User = get_user_model()
@@ -175,6 +182,41 @@ class TaskURLTests(TestCase):
         self.assertEqual(len(page_context_first_page), 10)
         self.assertEqual(len(page_context_last_page), 6)
 
+    def test_index_keyset_paginator(self):
+        """Курсорный режим обходит все посты по порядку без COUNT(*)."""
+        url = reverse('posts:index')
+        cursor = ''
+        seen = []
+        with CaptureQueriesContext(connection) as queries:
+            while cursor is not None:
+                response = self.second_author.get(url, {'cursor': cursor})
+                page_obj = response.context['page_obj']
+                self.assertLessEqual(len(page_obj), 10)
+                seen.extend(post.id for post in page_obj)
+                cursor = page_obj.next_cursor
+        expected = list(Post.objects.order_by(
+            '-pub_date', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+
+        response = self.second_author.get(
+            url, {'cursor': page_obj.previous_cursor})
+        previous_page = response.context['page_obj']
+        self.assertEqual([post.id for post in previous_page],
+                         expected[-13:-3])
+        self.assertTrue(previous_page.has_next())
+
+    def test_keyset_paginator_invalid_cursor(self):
+        """Некорректный курсор приводит к первой странице."""
+        response = self.second_author.get(
+            reverse('posts:group_list', kwargs={'slug': 'test_slug_2'}),
+            {'cursor': 'not-a-cursor'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 10)
+        self.assertFalse(page_obj.has_previous())
+        self.assertTrue(page_obj.has_next())
+
     def test_post_exists_correct_group(self):
         response_in_check_group = self.second_author.get(
             reverse('posts:group_list', kwargs={'slug': 'test_slug_1'}))
@@ -273,24 +315,68 @@ class TaskURLTests(TestCase):
     def test_cache_index(self):
         """Тест работы кэша"""
         self.second_author.get(reverse('posts:index'))
-        post_name_cache = 'Тест кэша'
+        # Изменение в обход сигналов не сбрасывает кэш: страница
+        # отдаётся из кэша без срока жизни
+        latest = Post.objects.first()
+        Post.objects.filter(id=latest.id).update(text='Тест кэша')
+        response = self.second_author.get(reverse('posts:index'))
+        self.assertNotIn('Тест кэша', response.content.decode())
+
+        # Новый пост сразу меняет поколение кэша и виден на странице
+        post_name_cache = 'Новый пост для кэша'
         Post.objects.create(
             text=post_name_cache,
             author=self.authors['second_author'],
         )
-        # Проверяем что после первого запроса в контенте страницы
-        # нет созданного поста
-        response = self.second_author.get(reverse('posts:index'))
-        content = response.content.decode()
-        self.assertNotIn(post_name_cache, content)
-
-        # Сбрасываем кэш и повторяем запрос, и проверяем,
-        # что пост уже есть на странице index
-        cache.clear()
         response = self.second_author.get(reverse('posts:index'))
         content = response.content.decode()
         self.assertIn(post_name_cache, content)
+        self.assertIn('Тест кэша', content)
         Post.objects.filter(text=post_name_cache).delete()
+        Post.objects.filter(id=latest.id).update(text=latest.text)
+
+    def test_cache_invalidated_by_edit_and_delete(self):
+        """Правка и удаление поста сбрасывают кэш group_list и profile."""
+        urls = (
+            reverse('posts:group_list', kwargs={'slug': 'test_slug_1'}),
+            reverse('posts:profile', kwargs={'username': 'first_author'}),
+        )
+        post = Post.objects.create(
+            text='Пост до правки',
+            author=self.authors['first_author'],
+            group=self.group['first_group'],
+        )
+        for url in urls:
+            self.assertContains(self.second_author.get(url), 'Пост до правки')
+        post.text = 'Пост после правки'
+        post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.second_author.get(url)
+                self.assertContains(response, 'Пост после правки')
+        post.delete()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.second_author.get(url)
+                self.assertNotContains(response, 'Пост после правки')
+
+    def test_comment_keeps_index_cache(self):
+        """Комментарий сбрасывает страницы поста, автора и группы."""
+        post = Post.objects.create(
+            text='Пост для комментария',
+            author=self.authors['first_author'],
+            group=self.group['first_group'],
+        )
+        scopes = (generations.INDEX, generations.post_scope(post.pk),
+                  generations.author_scope(post.author_id),
+                  generations.group_scope(post.group_id))
+        before = generations.get_generations(*scopes)
+        Comment.objects.create(post=post, author=post.author, text='Ответ')
+        after = generations.get_generations(*scopes)
+        self.assertEqual(after[generations.INDEX], before[generations.INDEX])
+        for scope in scopes[1:]:
+            with self.subTest(scope=scope):
+                self.assertNotEqual(after[scope], before[scope])
 
     def test_follow_unfollow_authorised(self):
         # проверяем начально количество подписок пользователя
@@ -332,3 +418,108 @@ class TaskURLTests(TestCase):
         content_not_follower = response_not_follower.content.decode()
         self.assertNotIn(post_text, content_not_follower)
         Post.objects.filter(text=post_text).delete()
+
+
+class QueryCountTests(TestCase):
+    """Число запросов страницы не зависит от числа постов на ней."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(15):
+            cls.post = Post.objects.create(
+                text=f'Пост {i}', author=cls.author, group=cls.group)
+            for commentator in (cls.author, cls.reader):
+                Comment.objects.create(
+                    post=cls.post, author=commentator, text='Комментарий')
+        # Лента уже прочитана: её сброс проверяет test_notifications
+        UserStats.objects.update(unread_count=0)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_list_views_query_count(self):
+        """Списки постов выполняют фиксированное число запросов."""
+        url_queries = {
+            reverse('posts:index'): 5,
+            reverse('posts:group_list', kwargs={'slug': 'group'}): 7,
+            reverse('posts:profile', kwargs={'username': 'author'}): 8,
+            # Плюс проверка непрочитанных постов
+            reverse('posts:follow_index'): 6,
+        }
+        for url, queries in url_queries.items():
+            for page in (1, 2):
+                with self.subTest(url=url, page=page):
+                    cache.clear()
+                    with self.assertNumQueries(queries):
+                        response = self.client.get(url, {'page': page})
+                    self.assertEqual(len(response.context['page_obj']),
+                                     10 if page == 1 else 5)
+
+    def test_post_detail_query_count(self):
+        """Страница поста не делает запросов на каждый комментарий."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        with self.assertNumQueries(6):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['comments']), 2)
+
+
+class PaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.author) for i in range(95))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_page_window(self):
+        """Навигация выводит соседние и крайние страницы с пропусками."""
+        paginator = Paginator(range(1000), 10)
+        windows = {
+            1: [1, 2, 3, None, 100],
+            50: [1, None, 48, 49, 50, 51, 52, None, 100],
+            99: [1, None, 97, 98, 99, 100],
+        }
+        for number, window in windows.items():
+            with self.subTest(number=number):
+                self.assertEqual(
+                    page_window(paginator.page(number)), window)
+
+    def test_links_are_bounded(self):
+        """На странице нет ссылок на все страницы подряд."""
+        response = self.client.get(reverse('posts:index'), {'page': 5})
+        self.assertContains(response, 'page=10"')
+        self.assertContains(response, 'page=7"')
+        self.assertNotContains(response, 'page=2"')
+        self.assertNotContains(response, 'page=8"')
+
+    def test_count_cached_until_new_post(self):
+        """Число постов считается один раз до появления нового поста."""
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        response = self.client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 95)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'page': 2})
+        self.assertFalse(any('COUNT' in query['sql']
+                             for query in queries.captured_queries))
+        Post.objects.create(text='Новый', author=self.author)
+        response = self.client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 96)
+
+    def test_estimated_count(self):
+        """При оценочном числе постов ссылки на последнюю страницу нет."""
+        with mock.patch('posts.utils.estimated_count', return_value=200000):
+            response = self.client.get(reverse('posts:index'))
+        paginator = response.context['page_obj'].paginator
+        self.assertTrue(paginator.estimated)
+        self.assertEqual(paginator.num_pages, 20000)
+        self.assertNotContains(response, 'Последняя')
@@ -0,0 +1,61 @@
+"""Фоновая подготовка уменьшенных картинок постов.
+
+Варианты картинки (posts.images) создаются после сохранения поста
+задачей очереди core.tasks, а шаблоны только читают готовый результат и до его
+появления выводят заглушку. Миниатюры sorl-thumbnail остаются запасным
+вариантом для постов, у которых вариантов ещё нет.
+"""
+from django.db import transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from core.tasks import after_commit, task
+
+from . import cache, images
+from .constants import POST_IMAGE_SIZES
+from .models import Post
+
+
+class CachedThumbnailBackend(ThumbnailBackend):
+    def get_cached_thumbnail(self, file_, geometry_string, **options):
+        """Готовая миниатюра из хранилища sorl или None, без отрисовки."""
+        source = ImageFile(file_)
+        # Те же умолчания, что и в ThumbnailBackend.get_thumbnail, чтобы
+        # имя файла миниатюры совпало с созданным в фоне
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+backend = CachedThumbnailBackend()
+
+
+def cached_thumbnail(image, size):
+    geometry, options = POST_IMAGE_SIZES[size]
+    return backend.get_cached_thumbnail(image, geometry, **options)
+
+
+@task
+def generate(post_id):
+    """Создаёт варианты картинки и сбрасывает кэш страниц поста."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return
+    images.build_variants(post)
+    after_commit(cache.bump_post, post)
+
+
+def enqueue(post):
+    """Ставит создание миниатюр в очередь после фиксации транзакции."""
+    if post.image:
+        transaction.on_commit(lambda: generate.delay(post.pk))
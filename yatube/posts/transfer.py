@@ -0,0 +1,389 @@
+"""Выгрузка и загрузка пользователей, групп, постов, комментариев и
+подписок в JSONL или CSV.
+
+Обе стороны работают потоком: выгрузка читает таблицы через iterator(),
+загрузка копит записи пачками и пишет их bulk_create, поэтому память не
+зависит от размера файла. Авторов, группы и посты пачка находит одним
+запросом. Посты и комментарии получают новые id, а id из файла хранится
+в их import_key, поэтому комментарии находят свои посты, загрузка в
+непустую базу не задевает её строк, а повторная загрузка того же
+источника пропускает уже загруженные записи.
+"""
+import csv
+import json
+import os
+import shutil
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from core.dbcopy import original_dates
+
+from . import cache, feed, search
+from .constants import TRANSFER_BATCH_SIZE
+from .counters import (recount_groups, recount_posts, recount_replies,
+                       recount_users)
+from .models import Comment, Follow, Group, Post, User
+
+# Порядок важен: записи ссылаются только на предыдущие типы
+RECORD_TYPES = ('user', 'group', 'post', 'comment', 'follow')
+CSV_FIELDS = (
+    'type', 'id', 'username', 'first_name', 'last_name', 'email',
+    'password', 'date_joined', 'slug', 'title', 'description', 'author',
+    'group', 'post', 'user', 'text', 'pub_date', 'image', 'parent',
+)
+
+
+def _exported(queryset, fields, batch_size):
+    for row in queryset.order_by('pk').values_list(*fields).iterator(
+            chunk_size=batch_size):
+        yield dict(zip(fields, row))
+
+
+def export_records(batch_size=TRANSFER_BATCH_SIZE):
+    """Записи всех типов в порядке RECORD_TYPES."""
+    for row in _exported(User.objects.all(), (
+            'username', 'first_name', 'last_name', 'email', 'password',
+            'date_joined'), batch_size):
+        yield {'type': 'user', **row}
+    for row in _exported(Group.objects.all(), (
+            'slug', 'title', 'description'), batch_size):
+        yield {'type': 'group', **row}
+    for row in _exported(Post.objects.all(), (
+            'id', 'author__username', 'group__slug', 'text', 'pub_date',
+            'image'), batch_size):
+        yield {'type': 'post', 'id': row['id'],
+               'author': row['author__username'],
+               'group': row['group__slug'], 'text': row['text'],
+               'pub_date': row['pub_date'], 'image': row['image']}
+    for row in _exported(Comment.objects.all(), (
+            'id', 'post_id', 'author__username', 'text', 'pub_date',
+            'parent_id'), batch_size):
+        yield {'type': 'comment', 'id': row['id'], 'post': row['post_id'],
+               'author': row['author__username'], 'text': row['text'],
+               'pub_date': row['pub_date'], 'parent': row['parent_id']}
+    for row in _exported(Follow.objects.all(), (
+            'user__username', 'author__username'), batch_size):
+        yield {'type': 'follow', 'user': row['user__username'],
+               'author': row['author__username']}
+
+
+def _serializable(record):
+    return {key: value.isoformat() if hasattr(value, 'isoformat') else value
+            for key, value in record.items()}
+
+
+def write_jsonl(records, stream):
+    for record in records:
+        stream.write(json.dumps(_serializable(record), ensure_ascii=False))
+        stream.write('\n')
+
+
+def write_csv(records, stream):
+    writer = csv.DictWriter(stream, CSV_FIELDS)
+    writer.writeheader()
+    for record in records:
+        writer.writerow(_serializable(record))
+
+
+def read_jsonl(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(stream):
+    # В CSV пустая ячейка означает отсутствие значения
+    for row in csv.DictReader(stream):
+        yield {key: value for key, value in row.items() if value != ''}
+
+
+def copy_images(records, images_dir):
+    """Копирует картинки постов из хранилища в images_dir по пути."""
+    for record in records:
+        if record['type'] == 'post' and record.get('image'):
+            target = os.path.join(images_dir, record['image'])
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with default_storage.open(record['image']) as source, \
+                    open(target, 'wb') as destination:
+                shutil.copyfileobj(source, destination)
+        yield record
+
+
+def _int(value):
+    # В CSV числа приходят строками
+    return None if value is None else int(value)
+
+
+def _date(value):
+    return value if hasattr(value, 'isoformat') else parse_datetime(value)
+
+
+class Importer:
+    """Загружает записи пачками по batch_size.
+
+    Перед записью пачки сбрасываются пачки типов, на которые она
+    ссылается, поэтому порядок записей в файле важен только между
+    типами, а не внутри них. Посты и комментарии запоминают свой id из
+    файла в import_key вместе с именем источника source: по нему
+    комментарии находят свои посты, а повторная загрузка того же
+    источника пропускает уже загруженные строки.
+    """
+
+    def __init__(self, batch_size=TRANSFER_BATCH_SIZE, images_dir=None,
+                 source=''):
+        self.batch_size = batch_size
+        self.images_dir = images_dir
+        self.source = source
+        self.buffers = {record_type: [] for record_type in RECORD_TYPES}
+        self.imported = Counter()
+        self.skipped = Counter()
+
+    def key(self, record_id):
+        """import_key строки с id record_id из файла или None."""
+        record_id = _int(record_id)
+        return None if record_id is None else f'{self.source}/{record_id}'
+
+    def add(self, record):
+        record_type = record.get('type')
+        if record_type not in self.buffers:
+            self.skipped['unknown'] += 1
+            return
+        self.buffers[record_type].append(record)
+        if len(self.buffers[record_type]) >= self.batch_size:
+            self.flush(record_type)
+
+    def flush(self, until=RECORD_TYPES[-1]):
+        for record_type in RECORD_TYPES[:RECORD_TYPES.index(until) + 1]:
+            records = self.buffers[record_type]
+            if records:
+                with transaction.atomic():
+                    getattr(self, f'_import_{record_type}s')(records)
+                self.buffers[record_type] = []
+
+    def finish(self):
+        """Дописывает остатки и пересчитывает то, что обходит bulk_create.
+
+        Пересчёт касается только постов источника, их авторов и групп,
+        а не всей базы. Списки строк не копятся в памяти: их выбирают
+        подзапросы и пачки по batch_size.
+        """
+        self.flush()
+        fill_comment_paths()
+        posts = Post.objects.filter(import_key__startswith=f'{self.source}/')
+        authors = posts.values('author_id')
+        # Новым пользователям нужны строки UserStats
+        recount_users(User.objects.filter(stats__isnull=True))
+        recount_users(User.objects.filter(pk__in=authors))
+        feed.rebuild(Follow.objects.filter(author_id__in=authors))
+        recount_groups(Group.objects.filter(pk__in=posts.values('group_id')))
+        for batch in _chunks(posts, self.batch_size):
+            recount_posts(Post.objects.filter(pk__in=batch))
+            recount_replies(Comment.objects.filter(post_id__in=batch))
+            search.rebuild(Post.objects.filter(pk__in=batch))
+        # RELATED входит в версию каждой страницы постов
+        cache.bump(cache.INDEX, cache.RELATED)
+
+    def _user_ids(self, usernames):
+        return dict(User.objects.filter(
+            username__in=set(usernames)).values_list('username', 'pk'))
+
+    def _save(self, model, objects, record_type, total, **kwargs):
+        with original_dates(model):
+            model.objects.bulk_create(objects, **kwargs)
+        self.imported[record_type] += len(objects)
+        self.skipped[record_type] += total - len(objects)
+
+    def _import_users(self, records):
+        usernames = [record['username'] for record in records]
+        existing = self._user_ids(usernames)
+        self._save(User, [
+            User(username=record['username'],
+                 first_name=record.get('first_name', ''),
+                 last_name=record.get('last_name', ''),
+                 email=record.get('email', ''),
+                 password=record.get('password') or make_password(None),
+                 **({'date_joined': _date(record['date_joined'])}
+                    if record.get('date_joined') else {}))
+            for record in records if record['username'] not in existing
+        ], 'user', len(records), ignore_conflicts=True)
+
+    def _import_groups(self, records):
+        existing = set(Group.objects.filter(slug__in={
+            record['slug'] for record in records
+        }).values_list('slug', flat=True))
+        self._save(Group, [
+            Group(slug=record['slug'], title=record['title'],
+                  description=record.get('description', ''))
+            for record in records if record['slug'] not in existing
+        ], 'group', len(records), ignore_conflicts=True)
+
+    def _image(self, name):
+        if not name or not self.images_dir:
+            return name or ''
+        source = os.path.join(self.images_dir, name)
+        if not os.path.isfile(source) or default_storage.exists(name):
+            return name
+        with open(source, 'rb') as image:
+            return default_storage.save(name, File(image))
+
+    def _existing(self, model, records):
+        # Уже загруженные строки и повторы id внутри пачки пропускаются
+        return set(model.objects.filter(import_key__in={
+            self.key(record.get('id')) for record in records
+        }).values_list('import_key', flat=True))
+
+    def _import_posts(self, records):
+        authors = self._user_ids(record.get('author') for record in records)
+        groups = dict(Group.objects.filter(slug__in={
+            record['group'] for record in records if record.get('group')
+        }).values_list('slug', 'pk'))
+        existing = self._existing(Post, records)
+        posts = []
+        for record in records:
+            key = self.key(record.get('id'))
+            if key in existing or record.get('author') not in authors:
+                continue
+            existing.add(key)
+            posts.append(Post(
+                import_key=key, author_id=authors[record['author']],
+                group_id=groups.get(record.get('group')),
+                text=record['text'], pub_date=_date(record['pub_date']),
+                image=self._image(record.get('image'))))
+        self._save(Post, posts, 'post', len(records))
+
+    def _import_comments(self, records):
+        authors = self._user_ids(record.get('author') for record in records)
+        posts = dict(Post.objects.filter(import_key__in={
+            self.key(record.get('post')) for record in records
+        }).values_list('import_key', 'pk'))
+        parents = self._parents(records)
+        existing = self._existing(Comment, records)
+        new = []
+        for record in records:
+            key = self.key(record.get('id'))
+            post_id = posts.get(self.key(record.get('post')))
+            if (key in existing or post_id is None
+                    or record.get('author') not in authors):
+                continue
+            existing.add(key)
+            pub_date = _date(record['pub_date'])
+            new.append((record, Comment(
+                import_key=key, post_id=post_id,
+                author_id=authors[record['author']], text=record['text'],
+                pub_date=pub_date, created=pub_date,
+                parent_id=self._parent_id(parents, record, post_id))))
+        self._save(Comment, [comment for _, comment in new], 'comment',
+                   len(records))
+        # Родитель из той же пачки получает id только после её записи
+        pending = [(record, comment) for record, comment in new
+                   if comment.parent_id is None and record.get('parent')
+                   and comment.import_key]
+        if not pending:
+            return
+        parents = self._parents(record for record, _ in pending)
+        saved = dict(Comment.objects.filter(import_key__in={
+            comment.import_key for _, comment in pending
+        }).values_list('import_key', 'pk'))
+        replies = []
+        for record, comment in pending:
+            parent_id = self._parent_id(parents, record, comment.post_id)
+            if parent_id is not None:
+                replies.append(Comment(pk=saved[comment.import_key],
+                                       parent_id=parent_id))
+        Comment.objects.bulk_update(replies, ['parent'])
+
+    def _parent_id(self, parents, record, post_id):
+        """id родителя в базе; он должен быть из того же файла и поста.
+
+        Ответ на комментарий, которого нет в файле или который относится
+        к другому посту, становится корневым.
+        """
+        parent_id, parent_post_id = parents.get(
+            self.key(record.get('parent')), (None, None))
+        return parent_id if parent_post_id == post_id else None
+
+    def _parents(self, records):
+        """{import_key: (id, id поста)} родителей комментариев records."""
+        return {
+            key: (pk, post_id)
+            for key, pk, post_id in Comment.objects.filter(import_key__in={
+                self.key(record.get('parent')) for record in records
+            }).values_list('import_key', 'pk', 'post_id')
+        }
+
+    def _import_follows(self, records):
+        users = self._user_ids(
+            username for record in records
+            for username in (record.get('user'), record.get('author')))
+        edges = {
+            (users[record['user']], users[record['author']])
+            for record in records
+            if record.get('user') in users and record.get('author') in users
+            and record['user'] != record['author']
+        }
+        existing = Follow.objects.filter(
+            user_id__in={user_id for user_id, _ in edges},
+            author_id__in={author_id for _, author_id in edges},
+        ).values_list('user_id', 'author_id')
+        follows = [Follow(user_id=user_id, author_id=author_id)
+                   for user_id, author_id in edges - set(existing)]
+        self._save(Follow, follows, 'follow', len(records),
+                   ignore_conflicts=True)
+        for follow in follows:
+            feed.backfill(follow.user_id, follow.author_id)
+        recount_users(User.objects.filter(pk__in={
+            pk for follow in follows
+            for pk in (follow.user_id, follow.author_id)}))
+
+
+def _chunks(queryset, size):
+    """id строк queryset списками по size, по возрастанию id."""
+    last = 0
+    while True:
+        ids = list(queryset.filter(pk__gt=last).order_by('pk').values_list(
+            'pk', flat=True)[:size])
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+def fill_comment_paths(batch_size=TRANSFER_BATCH_SIZE):
+    """Строит пути веток для комментариев, записанных bulk_create.
+
+    Ответ всегда моложе комментария, на который отвечает, поэтому при
+    обходе по id путь родителя уже записан или вычислен в той же пачке.
+    """
+    pending = Comment.objects.filter(path='').order_by('pk').values_list(
+        'pk', 'parent_id')
+    while True:
+        batch = list(pending[:batch_size])
+        if not batch:
+            return
+        paths = dict(Comment.objects.filter(pk__in={
+            parent_id for _, parent_id in batch if parent_id
+        }).exclude(path='').values_list('pk', 'path'))
+        comments = []
+        for pk, parent_id in batch:
+            paths[pk] = Comment.make_path(paths.get(parent_id, ''), pk)
+            comments.append(Comment(pk=pk, path=paths[pk]))
+        Comment.objects.bulk_update(comments, ['path'])
+
+
+def throughput(counter, seconds):
+    """Строки отчёта: записей каждого типа и в секунду."""
+    seconds = max(seconds, 1e-6)
+    lines = [
+        f'{record_type}: {counter[record_type]} '
+        f'({counter[record_type] / seconds:.0f}/с)'
+        for record_type in RECORD_TYPES if counter[record_type]
+    ]
+    total = sum(counter.values())
+    lines.append(f'Всего: {total} за {seconds:.1f} с '
+                 f'({total / seconds:.0f} записей/с)')
+    return '\n'.join(lines)
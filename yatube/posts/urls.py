@@ -5,13 +5,21 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('feed/<str:feed_format>/', views.index_feed, name='index_feed'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('group/<slug:slug>/feed/<str:feed_format>/', views.group_feed,
+         name='group_feed'),
+    path('search/', views.search_posts, name='search'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('profile/<str:username>/feed/<str:feed_format>/', views.author_feed,
+         name='author_feed'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/comment/', views.add_comment,
          name='add_comment'),
+    path('posts/<int:post_id>/comments/<int:comment_id>/',
+         views.comment_thread, name='comment_thread'),
     path('follow/', views.follow_index, name='follow_index'),
     path(
         'profile/<str:username>/follow/',
@@ -23,4 +31,14 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path('fragments/switcher/', views.switcher_fragment,
+         name='switcher_fragment'),
+    path('fragments/follow/<str:username>/', views.follow_fragment,
+         name='follow_fragment'),
+    path('fragments/posts/<int:post_id>/actions/',
+         views.post_actions_fragment, name='post_actions_fragment'),
+    path('fragments/posts/<int:post_id>/comments/',
+         views.comments_fragment, name='comments_fragment'),
+    path('fragments/comments/<int:comment_id>/replies/',
+         views.replies_fragment, name='replies_fragment'),
 ]
@@ -1,9 +1,242 @@
+import base64
+import binascii
+import hashlib
+from collections import defaultdict
+from collections.abc import Sequence
+
+from django.core.cache import cache as django_cache
 from django.core.paginator import Paginator
-from django.db.models import QuerySet
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from . import cache
+from .constants import (COMMENT_INLINE_REPLIES, COMMENT_PATH_WIDTH,
+                        COMMENTS_PER_PAGE, CURSOR_PARAM,
+                        PAGINATOR_ESTIMATE_MIN)
+from .models import Comment
+
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+
+
+class KeysetPage(Sequence):
+    """Страница курсорной пагинации.
+
+    Повторяет интерфейс django.core.paginator.Page, который нужен
+    шаблонам, но не знает ни номера страницы, ни общего их числа.
+    """
+    keyset = True
+
+    def __init__(self, object_list, cursor, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<KeysetPage {self.cursor or "first"}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Пагинация по ключу (pub_date, id) без COUNT(*) и OFFSET.
+
+    Следующая страница выбирается условием по последней записи текущей,
+    поэтому глубина страницы не влияет на стоимость запроса.
+    """
+
+    def __init__(self, object_list: QuerySet, per_page: int,
+                 keys=('pub_date', 'id')):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.keys = keys
+
+    def encode_cursor(self, direction, obj):
+        date_key, id_key = self.keys
+        raw = (f'{direction}{getattr(obj, date_key).isoformat()}'
+               f'|{getattr(obj, id_key)}')
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        """Возвращает (направление, дата, id) или None для первой страницы."""
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            date_value, id_value = raw[1:].split('|')
+            date_value, id_value = parse_datetime(date_value), int(id_value)
+        except (binascii.Error, UnicodeError, ValueError):
+            return None
+        if raw[0] not in (CURSOR_NEXT, CURSOR_PREVIOUS) or date_value is None:
+            return None
+        return raw[0], date_value, id_value
+
+    def get_page(self, cursor):
+        """Возвращает страницу; некорректный курсор даёт первую страницу."""
+        date_key, id_key = self.keys
+        position = self.decode_cursor(cursor)
+        post_list = self.object_list
+        if position is None:
+            cursor = None
+            post_list = post_list.order_by(f'-{date_key}', f'-{id_key}')
+        elif position[0] == CURSOR_NEXT:
+            _, date_value, id_value = position
+            post_list = post_list.filter(
+                Q(**{f'{date_key}__lte': date_value})
+                & (Q(**{f'{date_key}__lt': date_value})
+                   | Q(**{f'{id_key}__lt': id_value}))
+            ).order_by(f'-{date_key}', f'-{id_key}')
+        else:
+            _, date_value, id_value = position
+            post_list = post_list.filter(
+                Q(**{f'{date_key}__gte': date_value})
+                & (Q(**{f'{date_key}__gt': date_value})
+                   | Q(**{f'{id_key}__gt': id_value}))
+            ).order_by(date_key, id_key)
 
+        rows = list(post_list[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if position is not None and position[0] == CURSOR_PREVIOUS:
+            if not rows:
+                return self.get_page(None)
+            rows.reverse()
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = position is not None, has_more
 
-def posts_paginator(request, post_list: QuerySet, posts_count: int):
-    paginator = Paginator(post_list, posts_count)
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(CURSOR_NEXT, rows[-1])
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(CURSOR_PREVIOUS, rows[0])
+        return KeysetPage(rows, cursor, next_cursor, previous_cursor)
+
+
+def estimated_count(queryset: QuerySet):
+    """Оценка числа строк таблицы из статистики PostgreSQL или None.
+
+    Подходит только для запросов без условий и используется, когда
+    таблица больше PAGINATOR_ESTIMATE_MIN строк: точный COUNT(*) по ней
+    читает всю таблицу.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql' or queryset.query.where:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE relname = %s',
+            [queryset.model._meta.db_table])
+        row = cursor.fetchone()
+    if row is None or row[0] < PAGINATOR_ESTIMATE_MIN:
+        return None
+    return int(row[0])
+
+
+def cached_count(queryset: QuerySet, scopes):
+    """Число строк queryset, хранящееся в кэше.
+
+    Ключ включает запрос и поколения областей scopes (posts.cache),
+    поэтому новый или удалённый пост сразу даёт новый подсчёт.
+    """
+    key = 'posts:count:' + hashlib.md5(repr((
+        str(queryset.query), cache.cache_version(*scopes),
+    )).encode()).hexdigest()
+    count = django_cache.get(key)
+    if count is None:
+        count = queryset.count()
+        django_cache.set(key, count, None)
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который хранит число объектов в кэше.
+
+    Число берётся из cached_count по поколениям областей scopes. Без
+    scopes оно считается на каждый запрос, как в Paginator.
+    """
+
+    def __init__(self, object_list, per_page, scopes=(), **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.scopes = scopes
+        self.estimated = False
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is not None:
+            self.estimated = True
+            return estimate
+        if not self.scopes:
+            return self.object_list.count()
+        return cached_count(self.object_list, self.scopes)
+
+
+def posts_paginator(request, post_list: QuerySet, posts_count: int,
+                    scopes=()):
+    # Параметр cursor включает курсорный режим: пустое значение
+    # соответствует первой странице
+    if CURSOR_PARAM in request.GET:
+        paginator = KeysetPaginator(post_list, posts_count)
+        return paginator.get_page(request.GET.get(CURSOR_PARAM))
+    paginator = CachedCountPaginator(post_list, posts_count, scopes)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def comments_page(post_id, cursor):
+    """Страница корневых комментариев поста с небольшими ветками ответов.
+
+    Ветки до COMMENT_INLINE_REPLIES ответов читаются одним запросом
+    для всей страницы и лежат в comment.thread; для больших веток
+    шаблон выводит ссылку на comment_thread.
+    """
+    page = KeysetPaginator(
+        Comment.objects.roots().filter(post_id=post_id).select_related(
+            'author'), COMMENTS_PER_PAGE).get_page(cursor)
+    inline = [comment for comment in page
+              if 0 < comment.replies_count <= COMMENT_INLINE_REPLIES]
+    threads = defaultdict(list)
+    for reply in Comment.objects.descendants(*inline).select_related(
+            'author'):
+        # level — отступ в шаблоне относительно выведенного корня
+        reply.level = reply.depth
+        threads[reply.path[:COMMENT_PATH_WIDTH]].append(reply)
+    for comment in page:
+        comment.level = 0
+        comment.thread = threads[comment.path]
+    return page
+
+
+def replies_page(comment, after=None):
+    """Ответы на comment в порядке ветки, начиная после пути after.
+
+    Возвращает ответы и путь для следующей страницы или None.
+    """
+    replies = Comment.objects.descendants(comment).select_related('author')
+    if after and after.isdigit():
+        replies = replies.filter(path__gt=after)
+    replies = list(replies[:COMMENTS_PER_PAGE + 1])
+    for reply in replies:
+        reply.level = reply.depth - comment.depth
+    if len(replies) > COMMENTS_PER_PAGE:
+        replies = replies[:COMMENTS_PER_PAGE]
+        return replies, replies[-1].path
+    return replies, None
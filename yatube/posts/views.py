@@ -1,61 +1,150 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
+from django.views.decorators.cache import never_cache
 
-from .constants import POSTS_PER_PAGE, POST_FIRST_CHARS_TITLE
+from . import cache, notifications, search, syndication, thumbnails
+from .conditional import (author_feed_scopes, comment_scopes, edge_cache,
+                          group_feed_scopes, group_scopes, index_feed_scopes,
+                          index_scopes, page_condition, post_scopes,
+                          profile_scopes)
+from .constants import (COMMENT_MAX_DEPTH, CURSOR_PARAM, POSTS_PER_PAGE,
+                        POST_FIRST_CHARS_TITLE)
+from .counters import user_stats
 from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Comment, Follow
-from .utils import posts_paginator
+from .models import Post, Group, User, Comment, Follow, FeedEntry
+from .utils import comments_page, posts_paginator, replies_page
 
 
+@edge_cache
+@page_condition(index_scopes)
 def index(request):
-    post_list = Post.objects.select_related('group')
-    page_obj = posts_paginator(request, post_list, POSTS_PER_PAGE)
-    return render(request, 'posts/index.html', {'page_obj': page_obj})
+    post_list = Post.objects.with_related()
+    page_obj = posts_paginator(request, post_list, POSTS_PER_PAGE,
+                               [cache.INDEX])
+    context = {
+        'page_obj': page_obj,
+        'cache_version': cache.cache_version(cache.INDEX, cache.RELATED),
+    }
+    return render(request, 'posts/index.html', context)
 
 
+@edge_cache
+@page_condition(group_scopes)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    page_obj = posts_paginator(request, post_list, POSTS_PER_PAGE)
+    post_list = group.posts.select_related('author').prefetch_related(
+        'image_variants')
+    page_obj = posts_paginator(request, post_list, POSTS_PER_PAGE,
+                               [cache.group_scope(group.pk)])
     context = {
         'group': group,
         'page_obj': page_obj,
+        'cache_version': cache.cache_version(
+            cache.group_scope(group.pk), cache.RELATED),
     }
     return render(request, 'posts/group_list.html', context)
 
 
-def profile(request, username):
+def _check_format(feed_format):
+    if feed_format not in syndication.WRITERS:
+        raise Http404('Неизвестный формат ленты')
+
+
+@page_condition(index_feed_scopes, personal=False)
+def index_feed(request, feed_format):
+    _check_format(feed_format)
+    return syndication.feed_response(
+        request, feed_format, 'Последние обновления на сайте',
+        reverse('posts:index'), Post.objects.all(),
+        [cache.INDEX, cache.RELATED])
+
+
+@page_condition(group_feed_scopes, personal=False)
+def group_feed(request, slug, feed_format):
+    _check_format(feed_format)
+    group = get_object_or_404(Group, slug=slug)
+    return syndication.feed_response(
+        request, feed_format, f'Записи сообщества {group}',
+        reverse('posts:group_list', args=(slug,)), group.posts.all(),
+        [cache.group_scope(group.pk), cache.RELATED])
+
+
+@page_condition(author_feed_scopes, personal=False)
+def author_feed(request, username, feed_format):
+    _check_format(feed_format)
     author = get_object_or_404(User, username=username)
-    post_list = Post.objects.select_related('group').filter(
-        author_id=author.id)
-    page_obj = posts_paginator(request, post_list, POSTS_PER_PAGE)
+    return syndication.feed_response(
+        request, feed_format,
+        f'Все посты пользователя {author.get_full_name() or username}',
+        reverse('posts:profile', args=(username,)), author.posts.all(),
+        [cache.author_scope(author.pk), cache.RELATED])
+
 
-    following = False
-    if request.user.is_authenticated:
-        follow = Follow.objects.filter(author=author, user=request.user)
-        if follow.count() > 0:
-            following = True
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    post_list = search.search(query).with_related()
+    # Результаты упорядочены по релевантности, поэтому курсор по дате
+    # не подходит и страницы нумеруются
+    paginator = Paginator(post_list, POSTS_PER_PAGE)
+    context = {
+        'query': query,
+        'page_obj': paginator.get_page(request.GET.get('page')),
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def is_following(user, author):
+    return (
+        user.is_authenticated
+        and Follow.objects.filter(author=author, user=user).exists()
+    )
+
+
+@edge_cache
+@page_condition(profile_scopes)
+def profile(request, username):
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username)
+    post_list = Post.objects.with_related().filter(author_id=author.id)
+    page_obj = posts_paginator(request, post_list, POSTS_PER_PAGE,
+                               [cache.author_scope(author.pk)])
 
     context = {
         'page_obj': page_obj,
         'author': author,
-        'following': following,
+        'author_stats': user_stats(author),
+        'cache_version': cache.cache_version(
+            cache.author_scope(author.pk), cache.RELATED),
     }
+    if not settings.ESI_ENABLED:
+        # С ESI кнопку подписки отдаёт follow_fragment
+        context['following'] = is_following(request.user, author)
     return render(request, 'posts/profile.html', context)
 
 
+@edge_cache
+@page_condition(post_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    author_posts_count = Post.objects.filter(author_id=post.author_id).count()
+    post = get_object_or_404(
+        Post.objects.with_related().select_related('author__stats'),
+        id=post_id)
+    author_posts_count = user_stats(post.author).posts_count
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post_id=post_id)
     context = {
         'post': post,
         'char_count': POST_FIRST_CHARS_TITLE,
         'author_posts_count': author_posts_count,
         'form': form,
-        'comments': comments
     }
+    if not settings.ESI_ENABLED:
+        # С ESI комментарии отдаёт comments_fragment. Корневые
+        # комментарии листаются курсором, ветки — по пути
+        context['comments'] = comments_page(
+            post_id, request.GET.get(CURSOR_PARAM))
     return render(request, 'posts/post_detail.html', context)
 
 
@@ -66,6 +155,7 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        thumbnails.enqueue(post)
         return redirect('posts:profile', post.author.username)
     return render(request, 'posts/create_post.html', {'form': form})
 
@@ -73,13 +163,17 @@ def post_create(request):
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
-    if request.user != post.author:
+    if request.user.id != post.author_id:
         return redirect('posts:post_detail', post_id)
     form = PostForm(request.POST or None,
                     files=request.FILES or None,
                     instance=post)
     if form.is_valid():
-        form.save()
+        # Счётчики поста задачи меняют через F(): полная запись строки
+        # затёрла бы приращения, сделанные после её чтения
+        form.save(commit=False).save(update_fields=PostForm.Meta.fields)
+        if 'image' in form.changed_data:
+            thumbnails.enqueue(post)
         return redirect('posts:post_detail', post_id)
     context = {
         'form': form,
@@ -96,17 +190,52 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        comment.parent = _reply_parent(request, post)
         comment.save()
+        if comment.parent is not None:
+            return redirect('posts:comment_thread', post_id=post_id,
+                            comment_id=comment.parent_id)
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def _reply_parent(request, post):
+    # Ответ приходит параметром parent, а не полем CommentForm
+    parent_id = request.POST.get('parent', '')
+    if not parent_id.isdigit():
+        return None
+    parent = Comment.objects.filter(pk=parent_id, post=post).first()
+    if parent is not None and parent.depth + 1 >= COMMENT_MAX_DEPTH:
+        # Глубже COMMENT_MAX_DEPTH ветка не растёт: ответ встаёт рядом
+        return parent.parent
+    return parent
+
+
+def comment_thread(request, post_id, comment_id):
+    comment = get_object_or_404(
+        Comment.objects.select_related('author', 'post'),
+        pk=comment_id, post_id=post_id)
+    context = {
+        'post': comment.post,
+        'comment': comment,
+        'form': CommentForm(),
+    }
+    if not settings.ESI_ENABLED:
+        # С ESI ответы отдаёт replies_fragment
+        context['replies'], context['next_after'] = replies_page(
+            comment, request.GET.get('after'))
+    return render(request, 'posts/comment_thread.html', context)
+
+
 @login_required
 def follow_index(request):
-    followed_authors = Follow.objects.filter(user=request.user)
-    author_ids = [followed.author.id for followed in followed_authors]
-    post_list = Post.objects.filter(
-        author__in=author_ids).select_related('group')
-    page_obj = posts_paginator(request, post_list, POSTS_PER_PAGE)
+    # Лента уже материализована в FeedEntry, читаем её одним диапазоном
+    entries = FeedEntry.objects.filter(
+        user=request.user).select_related(
+        'post__author', 'post__group').prefetch_related(
+        'post__image_variants')
+    page_obj = posts_paginator(request, entries, POSTS_PER_PAGE)
+    page_obj.object_list = [entry.post for entry in page_obj]
+    notifications.mark_read(request.user.pk)
     return render(request, 'posts/follow.html', {'page_obj': page_obj})
 
 
@@ -115,8 +244,7 @@ def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     user = request.user
     if author != user:
-        if Follow.objects.filter(author=author, user=user).count() == 0:
-            Follow.objects.create(author=author, user=user)
+        Follow.objects.get_or_create(author=author, user=user)
     return redirect('posts:profile', username)
 
 
@@ -125,3 +253,57 @@ def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(author=author, user=request.user).delete()
     return redirect('posts:index')
+
+
+@never_cache
+def switcher_fragment(request):
+    return render(request, 'posts/includes/switcher.html')
+
+
+@never_cache
+def follow_fragment(request, username):
+    author = get_object_or_404(User, username=username)
+    context = {
+        'author': author,
+        'following': is_following(request.user, author),
+    }
+    return render(request, 'posts/includes/follow_button.html', context)
+
+
+# Фрагменты комментариев для <esi:include> в post_detail и
+# comment_thread: не зависят от пользователя и кэшируются отдельно от
+# страницы, ссылки на следующие страницы ведут на сами страницы
+@edge_cache
+@page_condition(post_scopes, personal=False)
+def comments_fragment(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    context = {
+        'post': post,
+        'comments': comments_page(post_id, request.GET.get(CURSOR_PARAM)),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+@edge_cache
+@page_condition(comment_scopes, personal=False)
+def replies_fragment(request, comment_id):
+    comment = get_object_or_404(
+        Comment.objects.select_related('post'), pk=comment_id)
+    replies, next_after = replies_page(comment, request.GET.get('after'))
+    context = {
+        'post': comment.post,
+        'comment': comment,
+        'replies': replies,
+        'next_after': next_after,
+    }
+    return render(request, 'posts/includes/comment_replies.html', context)
+
+
+@never_cache
+def post_actions_fragment(request, post_id):
+    post = get_object_or_404(Post.objects.only('id', 'author_id'), id=post_id)
+    context = {
+        'post': post,
+        'form': CommentForm(),
+    }
+    return render(request, 'posts/includes/post_actions.html', context)
@@ -49,15 +49,18 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -67,7 +70,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.profiling.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -77,23 +80,112 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.esi.esi',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# Потоки, в которых yatube.asgi выполняет запросы Django
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 16))
 
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+# База выбирается переменной окружения DB_ENGINE: sqlite (по умолчанию)
+# или postgresql (требует пакет psycopg2). SQLite пропускает только одну
+# пишущую транзакцию за раз, для нескольких воркеров нужен PostgreSQL.
+# Данные из db.sqlite3 переносятся командой copy_database
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'yatube'),
+            'USER': os.environ.get('DB_USER', 'yatube'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', '127.0.0.1'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Соединение живёт между запросами воркера, а не открывается
+            # на каждый запрос заново
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            # Пул соединений Django 2.2 не умеет: его держит PgBouncer
+            # в режиме transaction (DB_PGBOUNCER=1, DB_HOST и DB_PORT
+            # указывают на PgBouncer). Серверные курсоры iterator() в
+            # этом режиме не переживают границу транзакции
+            'DISABLE_SERVER_SIDE_CURSORS': (
+                os.environ.get('DB_PGBOUNCER', '') == '1'),
+        }
+    }
+    # Реплики для чтения: DB_REPLICA_HOSTS=host1,host2 с теми же
+    # именем базы и учётными данными, что и основная
+    for number, host in enumerate(
+            filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')),
+            start=1):
+        DATABASES[f'replica_{number}'] = {
+            **DATABASES['default'],
+            'HOST': host.strip(),
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get(
+                'DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+            # Секунды ожидания блокировки записи до ошибки database is locked
+            'OPTIONS': {'timeout': 20},
+        }
     }
+
+DATABASE_ROUTERS = ['core.routing.ReplicaRouter']
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+# Страницы, которые только читают данные и могут обслуживаться репликой
+READ_REPLICA_VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+    'api:post_list',
+    'api:post_detail',
+    'api:comment_list',
+    'api:group_list',
+    'api:follow_list',
+)
+# Сколько секунд после записи браузер читает из основной базы
+DATABASE_REPLICA_PIN_SECONDS = int(
+    os.environ.get('DB_REPLICA_PIN_SECONDS', 10))
+
+# Кэширование страниц обратным прокси. Для гостей страницы постов
+# отдаются с Cache-Control: public на EDGE_CACHE_SECONDS. При ESI_ENABLED
+# пользовательские части (шапка, подписка, форма комментария) выводятся
+# тегами <esi:include>, которые прокси запрашивает отдельно, и страница
+# кэшируется общей для всех; иначе они встраиваются в страницу
+ESI_ENABLED = os.environ.get('ESI_ENABLED', '') == '1'
+EDGE_CACHE_SECONDS = int(os.environ.get('EDGE_CACHE_SECONDS', 60))
+
+# Прагмы для каждого нового соединения SQLite (core.sqlite). WAL не
+# блокирует читателей во время записи, synchronous=normal в этом режиме
+# не теряет целостность при сбое. Режим журнала сохраняется в самом
+# файле базы, поэтому WAL включается явно (SQLITE_JOURNAL_MODE=wal) для
+# рабочей базы, а db.sqlite3 из репозитория остаётся как есть.
+# Сравнение с журналом отката: python manage.py benchmark_sqlite
+SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', '')
+SQLITE_PRAGMAS = {
+    'synchronous': os.environ.get(
+        'SQLITE_SYNCHRONOUS',
+        'normal' if SQLITE_JOURNAL_MODE == 'wal' else 'full'),
+    # Отрицательное значение задаёт размер кэша страниц в КиБ
+    'cache_size': -int(os.environ.get('SQLITE_CACHE_KB', 65536)),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 268435456)),
+    'temp_store': 'memory',
 }
+if SQLITE_JOURNAL_MODE:
+    SQLITE_PRAGMAS['journal_mode'] = SQLITE_JOURNAL_MODE
 
 
 # Password validation
@@ -142,11 +234,74 @@ LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Очередь задач core.tasks. Запрос только ставит задачи в очередь,
+# выполняет их команда run_tasks. TASKS_EAGER=1 выполняет их сразу в
+# запросе; так работают тесты (core.testing и conftest.py)
+TASKS_EAGER = os.environ.get('TASKS_EAGER', '0') == '1'
+TASKS_MAX_ATTEMPTS = 5
+TASKS_RETRY_DELAY = 10
+TASKS_LOCK_TIMEOUT = 600
+TASKS_POLL_SECONDS = 1.0
+TEST_RUNNER = 'core.testing.EagerTasksRunner'
+
+# Письма уходят через очередь, отправляет их TASKS_EMAIL_BACKEND
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+TASKS_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+# Адрес сайта для ссылок в письмах, которые отправляются вне запроса
+SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000')
+
+# Кэш выбирается переменной окружения CACHE_BACKEND. LocMemCache у
+# каждого процесса свой: поколения кэша (posts.cache) меняет воркер
+# run_tasks, и веб-процессы их бы не увидели. Поэтому LocMemCache
+# допускается только вместе с TASKS_EAGER=1 (core.tasks.check_cache),
+# для нескольких процессов нужен общий кэш: file, memcached или redis
+# (требует пакет django-redis)
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+    'redis': 'django_redis.cache.RedisCache',
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'file')
+CACHE_DEFAULT_LOCATIONS = {
+    'file': '/var/tmp/yatube_cache',
+    'memcached': '127.0.0.1:11211',
+    'redis': 'redis://127.0.0.1:6379/1',
+}
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION', CACHE_DEFAULT_LOCATIONS.get(CACHE_BACKEND, '')),
+        'KEY_PREFIX': os.environ.get('CACHE_KEY_PREFIX', 'yatube'),
+        'VERSION': int(os.environ.get('CACHE_VERSION', 1)),
+    }
+}
+if CACHE_BACKEND in ('locmem', 'file'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000)),
     }
+
+# Профилирование запросов: SQL, шаблоны и размер ответа
+# в заголовке Server-Timing и в логе core.profiling
+PROFILING_ENABLED = False
+PROFILING_ALLOW_HEADER = DEBUG
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }